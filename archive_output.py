@@ -0,0 +1,150 @@
+import io
+import os
+import shutil
+import tarfile
+import time
+import zipfile
+from pathlib import Path
+from extract_zip import ZipMember, zip_member_size, open_zip_member
+from write_behind import encode_text
+
+ARCHIVE_FORMATS = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.zst')
+
+def archive_format(archive_path):
+    """Archive format from the file name, e.g. '.tar.gz'; raises ValueError if unsupported."""
+    name = Path(archive_path).name.lower()
+    for suffix in sorted(ARCHIVE_FORMATS, key=len, reverse=True):
+        if name.endswith(suffix):
+            return suffix
+    raise ValueError(f"Unsupported output_archive {archive_path!r}, expected one of: {', '.join(ARCHIVE_FORMATS)}")
+
+def _open_source(src_path):
+    if isinstance(src_path, ZipMember):
+        return open_zip_member(src_path), zip_member_size(src_path)
+    src = open(src_path, 'rb')
+    return src, os.fstat(src.fileno()).st_size
+
+class ArchiveOutput:
+    """
+    Writes the whole vault (markdown and Assets/) into one ZIP or tar archive
+    in a single sequential pass, using the same relative layout as the
+    folder output. Member names are relative to output_base.
+
+    Markdown is deflated in ZIPs; assets are stored as-is since images are
+    already compressed. .tar.zst needs the optional 'zstandard' package.
+    The archive is written to a temp file and renamed into place by close(),
+    so a failed run never leaves a truncated archive.
+
+    Offers the same place()/stats interface as AssetStore. An asset already
+    in the archive under the same name is not added again.
+    """
+
+    def __init__(self, archive_path, output_base):
+        self.path = Path(archive_path)
+        self.output_base = Path(output_base)
+        self.format = archive_format(self.path)
+        self.stats = {'assets_copied': 0, 'assets_linked': 0, 'asset_bytes_saved': 0, 'asset_bytes_copied': 0}
+        self._names = set()
+        self._tmp_path = self.path.with_name(self.path.name + '.tmp')
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._raw = None
+        self._zip = None
+        self._tar = None
+        if self.format == '.zip':
+            self._zip = zipfile.ZipFile(self._tmp_path, 'w', zipfile.ZIP_DEFLATED)
+        elif self.format == '.tar.zst':
+            try:
+                import zstandard
+            except ImportError:
+                raise ValueError("Writing .tar.zst archives requires the 'zstandard' package (pip install zstandard)") from None
+            self._raw = zstandard.ZstdCompressor().stream_writer(open(self._tmp_path, 'wb'))
+            self._tar = tarfile.open(fileobj=self._raw, mode='w|')
+        else:
+            mode = 'w:gz' if self.format in ('.tar.gz', '.tgz') else 'w'
+            self._tar = tarfile.open(self._tmp_path, mode)
+
+    def _member_name(self, path):
+        return Path(path).relative_to(self.output_base).as_posix()
+
+    def _tar_info(self, name, size):
+        info = tarfile.TarInfo(name)
+        info.size = size
+        info.mtime = int(time.time())
+        info.mode = 0o644
+        return info
+
+    def _unique_name(self, name):
+        """name, or "name (2)", "name (3)", ... if a member already has it."""
+        if name not in self._names:
+            return name
+        stem, dot, suffix = name.rpartition('.')
+        if not dot or '/' in suffix:
+            stem, dot, suffix = name, '', ''
+        number = 2
+        while f"{stem} ({number}){dot}{suffix}" in self._names:
+            number += 1
+        return f"{stem} ({number}){dot}{suffix}"
+
+    def write_text(self, file_path, text):
+        """
+        Add a markdown file, encoded exactly as folder output writes it
+        (platform newlines, UTF-8). Archives cannot replace a member, so a
+        path written twice (conversations without an id sharing a title)
+        gets a numbered name like "New chat (2).md" instead of a duplicate
+        member.
+        Returns: ('new', number of bytes written), matching write_text_if_changed
+        """
+        name = self._unique_name(self._member_name(file_path))
+        data = encode_text(text)
+        if self._zip is not None:
+            info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            self._zip.writestr(info, data)
+        else:
+            self._tar.addfile(self._tar_info(name, len(data)), io.BytesIO(data))
+        self._names.add(name)
+        return 'new', len(data)
+
+    def place(self, src_path, target_path):
+        """Add an attachment unless a member with that name was already written."""
+        name = self._member_name(target_path)
+        if name in self._names:
+            return
+        self._names.add(name)
+
+        src, size = _open_source(src_path)
+        with src:
+            if self._zip is not None:
+                info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+                info.compress_type = zipfile.ZIP_STORED
+                info.file_size = size
+                with self._zip.open(info, 'w') as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+            else:
+                self._tar.addfile(self._tar_info(name, size), src)
+        self.stats['assets_copied'] += 1
+        self.stats['asset_bytes_copied'] += size
+
+    def close(self):
+        """Finish the archive and move it into place."""
+        if self._zip is not None:
+            self._zip.close()
+        else:
+            self._tar.close()
+            if self._raw is not None:
+                self._raw.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        """Discard a partially written archive."""
+        try:
+            if self._zip is not None:
+                self._zip.close()
+            else:
+                self._tar.close()
+                if self._raw is not None:
+                    self._raw.close()
+        finally:
+            if self._tmp_path.exists():
+                self._tmp_path.unlink()
@@ -0,0 +1,218 @@
+import hashlib
+import os
+import shutil
+import sys
+import threading
+from pathlib import Path
+from extract_zip import ZipMember, zip_member_size, copy_zip_member
+
+ASSET_MODES = ('copy', 'hardlink', 'reflink', 'symlink')
+
+# Linux FICLONE ioctl (btrfs, XFS, bcachefs, ...)
+FICLONE = 0x40049409
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _copy_atomic(src_path, target_path):
+    """Copy through a temp file and rename, so an interrupted copy never leaves a partial asset."""
+    target_path = Path(target_path)
+    tmp_path = target_path.with_name(f".{target_path.name}.tmp")
+    try:
+        if isinstance(src_path, ZipMember):
+            copy_zip_member(src_path, tmp_path)
+        else:
+            shutil.copy2(src_path, tmp_path)
+        # On disk before the rename: after a power loss an empty asset would be kept for good
+        with open(tmp_path, 'rb+') as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, target_path)
+    except BaseException:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
+
+def _reflink(src_path, target_path):
+    """Clone src into target sharing the same extents (copy-on-write)."""
+    if not sys.platform.startswith('linux'):
+        raise OSError("reflink is only supported on Linux")
+    import fcntl
+    with open(src_path, 'rb') as src, open(target_path, 'wb') as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            os.unlink(target_path)
+            raise
+
+class AssetStore:
+    """
+    Places attachments into Assets/ so identical content is stored once.
+
+    Files are placed from the export using the configured mode:
+
+    - copy: regular copy (default); every asset is an independent file
+    - hardlink: hard link to the file in the extracted export
+    - reflink: copy-on-write clone, where the filesystem supports it
+    - symlink: symbolic link to the file in the export
+
+    In the link modes, each blob is identified by size, then SHA-256
+    (hashing only happens when two files have the same size), and later
+    files with the same content are linked to the first one: hard-linked,
+    cloned or symlinked, following the mode. copy mode never links, so
+    duplicates are copied too. Any link that fails falls back to a copy.
+    ZIP members are always extracted first, since they can't be linked, and
+    replaced with a link if they turn out to duplicate an existing blob.
+    Copies go through a temp file and a rename. place() may be called from
+    several writer threads. Copies and hashes run outside the store's lock,
+    which only covers claiming the target and updating the stats; in the
+    link modes, assets of the same size are placed one at a time so two
+    identical files are never both stored as new blobs. Folders
+    are created through directories (an organize.OutputDirectories), when
+    given, so each Assets/ subfolder is only made once per run.
+    """
+
+    def __init__(self, output_base, mode='copy', directories=None):
+        if mode not in ASSET_MODES:
+            raise ValueError(f"Unknown asset_mode {mode!r}, expected one of: {', '.join(ASSET_MODES)}")
+        self.assets_dir = Path(output_base) / 'Assets'
+        self.mode = mode
+        self.directories = directories
+        self.stats = {'assets_copied': 0, 'assets_linked': 0, 'asset_bytes_saved': 0, 'asset_bytes_copied': 0}
+        # size -> list of [path, sha256 or None] for blobs already in Assets/
+        self._blobs_by_size = None
+        # Guards the index, stats and _placing; size_locks serialize deduplication per blob size
+        self._lock = threading.Lock()
+        self._size_locks = {}
+        self._placing = set()
+
+    def _load_existing(self):
+        """Seed the content index from assets written by earlier runs."""
+        self._blobs_by_size = {}
+        if not self.assets_dir.is_dir():
+            return
+        for dir_path, _, file_names in os.walk(self.assets_dir):
+            for name in file_names:
+                path = Path(dir_path) / name
+                if path.is_symlink() or name.endswith('.tmp'):
+                    continue
+                self._blobs_by_size.setdefault(path.stat().st_size, []).append([path, None])
+
+    def _find_duplicate(self, src_path, size):
+        """Return the path of an existing blob with the same content, or None."""
+        candidates = self._blobs_by_size.get(size)
+        if not candidates:
+            return None, None
+
+        src_hash = _hash_file(src_path)
+        for candidate in candidates:
+            if candidate[1] is None:
+                candidate[1] = _hash_file(candidate[0])
+            if candidate[1] == src_hash:
+                return candidate[0], src_hash
+        return None, src_hash
+
+    def _place_from_source(self, src_path, target_path):
+        """Put the first copy of some content into Assets/. Returns True if linked."""
+        if isinstance(src_path, ZipMember):
+            _copy_atomic(src_path, target_path)
+            return False
+
+        try:
+            if self.mode == 'hardlink':
+                os.link(src_path, target_path)
+                return True
+            if self.mode == 'symlink':
+                os.symlink(Path(src_path).resolve(), target_path)
+                return True
+            if self.mode == 'reflink':
+                _reflink(src_path, target_path)
+                return True
+        except OSError:
+            pass
+
+        _copy_atomic(src_path, target_path)
+        return False
+
+    def _link_duplicate(self, blob_path, target_path):
+        """Point target at an existing blob with identical content. Returns True if linked."""
+        try:
+            if self.mode == 'symlink':
+                os.symlink(Path(blob_path).resolve(), target_path)
+            elif self.mode == 'reflink':
+                _reflink(blob_path, target_path)
+            else:
+                os.link(blob_path, target_path)
+            return True
+        except OSError:
+            _copy_atomic(blob_path, target_path)
+            return False
+
+    def place(self, src_path, target_path):
+        """Put src_path at target_path unless the target already exists."""
+        target_path = Path(target_path)
+        with self._lock:
+            # One lstat: the target exists, or is a (possibly dangling) symlink
+            if target_path in self._placing or os.path.lexists(target_path):
+                return
+            self._placing.add(target_path)
+            if self.mode != 'copy' and self._blobs_by_size is None:
+                self._load_existing()
+        try:
+            self._place(src_path, target_path)
+        finally:
+            with self._lock:
+                self._placing.discard(target_path)
+
+    def _place(self, src_path, target_path):
+        if self.directories is not None:
+            self.directories.ensure(target_path.parent)
+        else:
+            target_path.parent.mkdir(parents=True, exist_ok=True)
+
+        size = zip_member_size(src_path) if isinstance(src_path, ZipMember) else os.stat(src_path).st_size
+        if self.mode == 'copy':
+            # Copies stay independent files, so there is nothing to deduplicate
+            _copy_atomic(src_path, target_path)
+            linked = False
+        else:
+            # Only blobs of the same size can be duplicates, so other sizes are hashed and placed concurrently
+            with self._lock:
+                size_lock = self._size_locks.setdefault(size, threading.Lock())
+            with size_lock:
+                linked = self._place_deduplicated(src_path, target_path, size)
+
+        with self._lock:
+            if linked:
+                self.stats['assets_linked'] += 1
+                self.stats['asset_bytes_saved'] += size
+            else:
+                self.stats['assets_copied'] += 1
+                self.stats['asset_bytes_copied'] += size
+
+    def _place_deduplicated(self, src_path, target_path, size):
+        """Link target to an existing blob with the same content, or place it as a new blob. Returns True if linked."""
+        if isinstance(src_path, ZipMember):
+            if size in self._blobs_by_size:
+                # Extract, then check the bytes against blobs of the same size
+                _copy_atomic(src_path, target_path)
+                blob_path, src_hash = self._find_duplicate(target_path, size)
+                if blob_path is not None:
+                    target_path.unlink()
+            else:
+                blob_path, src_hash = None, None
+        else:
+            blob_path, src_hash = self._find_duplicate(src_path, size)
+
+        if blob_path is not None:
+            return self._link_duplicate(blob_path, target_path)
+        if not target_path.exists():
+            linked = self._place_from_source(src_path, target_path)
+        else:
+            linked = False
+        self._blobs_by_size.setdefault(size, []).append([target_path, src_hash])
+        return linked
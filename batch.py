@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Convert many exports (e.g. one per person) in a single run.
+
+Usage:
+    python batch.py JOBS.json [--workers N] [--report batch-report.json]
+
+JOBS.json:
+    {
+      "config": "config.json",
+      "defaults": {"organization_mode": "hybrid"},
+      "jobs": [
+        {"name": "alice", "input_path": "exports/alice.zip",
+         "output_directory": "vaults/alice", "user_name": "Alice"},
+        {"name": "bob", "input_path": "exports/bob", "output_directory": "vaults/bob"}
+      ]
+    }
+
+Each job is the base config (the optional "config" file, then "defaults")
+with the job's own keys on top. Relative paths are resolved against the
+folder holding the job file. input_mode is detected from input_path when a
+job does not set it.
+
+Jobs share one process pool and are started largest export first, so a big
+export is not left running alone at the end. Each job writes its console
+output to convert.log in its output folder. A job that fails is reported
+and the rest of the batch carries on.
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+from chatgpt_json_to_markdown import open_export, convert_export, read_json_file
+from extract_zip import forget_open_zips
+
+JOB_LOG_NAME = 'convert.log'
+
+# Job keys holding paths that are resolved relative to the job file
+PATH_KEYS = ('input_path', 'output_directory', 'output_archive')
+
+def load_jobs(jobs_path):
+    """
+    Read a job file into a list of job dicts ({'name', 'config'}).
+    Raises ValueError for a malformed job file.
+    """
+    jobs_path = Path(jobs_path)
+    base_dir = jobs_path.parent
+    spec = read_json_file(jobs_path)
+    if not isinstance(spec, dict) or not isinstance(spec.get('jobs'), list):
+        raise ValueError(f"{jobs_path} must be an object with a 'jobs' list")
+
+    def resolve(value):
+        return str(base_dir / value) if value else value
+
+    base_config = {}
+    if spec.get('config'):
+        base_config.update(read_json_file(base_dir / spec['config']))
+    base_config.update(spec.get('defaults') or {})
+
+    jobs = []
+    output_dirs = set()
+    for number, job in enumerate(spec['jobs'], 1):
+        config = dict(base_config)
+        config.update({key: value for key, value in job.items() if key != 'name'})
+        for key in PATH_KEYS:
+            if key in job:
+                config[key] = resolve(job[key])
+        if 'input_paths' in job:
+            config['input_paths'] = [resolve(path) for path in job['input_paths']]
+        if 'input_path' in job and 'input_mode' not in job:
+            # Detect the kind of export instead of inheriting the base config's mode
+            config.pop('input_mode', None)
+        # Jobs run side by side on the shared pool, so each renders on one process
+        config['workers'] = 1
+
+        if not config.get('output_directory') or not (config.get('input_path') or config.get('input_paths')):
+            raise ValueError(f"Job {number} needs input_path (or input_paths) and output_directory")
+        output_dir = Path(config['output_directory']).resolve()
+        if output_dir in output_dirs:
+            raise ValueError(f"Job {number} uses the same output_directory as an earlier job: {output_dir}")
+        output_dirs.add(output_dir)
+
+        jobs.append({'name': job.get('name') or output_dir.name, 'config': config})
+    return jobs
+
+def export_size(config):
+    """Bytes of conversation JSON a job has to read (used to start the largest jobs first)."""
+    paths = config.get('input_paths') or [config['input_path']]
+    input_mode = None if config.get('input_paths') else config.get('input_mode')
+    return sum(open_export(path, input_mode)[0].total_bytes for path in paths)
+
+def run_job(job):
+    """
+    Convert one export in a pool worker. Never raises: failures are
+    returned in the status and the traceback goes to the job's log.
+    """
+    # export_size() opened the job's ZIPs in the parent; don't share those handles
+    forget_open_zips()
+    config = job['config']
+    status = {'name': job['name'], 'output_directory': config['output_directory']}
+    start = time.perf_counter()
+    log_path = Path(config['output_directory']) / JOB_LOG_NAME
+    try:
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(log_path, 'w', encoding='utf-8') as log:
+            with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+                try:
+                    status['stats'] = convert_export(config)
+                    status['status'] = 'ok'
+                except Exception as e:
+                    traceback.print_exc()
+                    status['status'] = 'failed'
+                    status['error'] = f"{type(e).__name__}: {e}"
+    except OSError as e:
+        status['status'] = 'failed'
+        status['error'] = f"{type(e).__name__}: {e}"
+    status['seconds'] = round(time.perf_counter() - start, 3)
+    return status
+
+def aggregate(statuses):
+    """Totals over all jobs for the batch report."""
+    totals = {'jobs': len(statuses), 'ok': 0, 'failed': 0}
+    for status in statuses:
+        totals[status['status']] += 1
+        for key, value in (status.get('stats') or {}).items():
+            if isinstance(value, (int, float)):
+                totals[key] = totals.get(key, 0) + value
+    return totals
+
+def run_batch(jobs, workers):
+    """
+    Run every job on one process pool, largest export first.
+    Returns: list of per-job status dicts, in job file order
+    """
+    statuses = [None] * len(jobs)
+    sizes = {}
+    for index, job in enumerate(jobs):
+        try:
+            sizes[index] = export_size(job['config'])
+        except (ValueError, FileNotFoundError, OSError) as e:
+            statuses[index] = {'name': job['name'], 'output_directory': job['config']['output_directory'],
+                               'status': 'failed', 'error': f"{type(e).__name__}: {e}", 'seconds': 0}
+            print(f"❌ {job['name']}: {statuses[index]['error']}")
+
+    order = sorted(sizes, key=lambda index: -sizes[index])
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_job, jobs[index]): index for index in order}
+        for done, future in enumerate(as_completed(futures), 1):
+            index = futures[future]
+            try:
+                status = future.result()
+            except Exception as e:
+                # The worker process itself died (e.g. out of memory)
+                status = {'name': jobs[index]['name'], 'output_directory': jobs[index]['config']['output_directory'],
+                          'status': 'failed', 'error': f"{type(e).__name__}: {e}", 'seconds': 0}
+            status['export_bytes'] = sizes[index]
+            statuses[index] = status
+            if status['status'] == 'ok':
+                stats = status['stats']
+                print(f"✅ [{done}/{len(order)}] {status['name']}: {stats.get('rendered', 0)} rendered, "
+                      f"{stats.get('unchanged', 0)} unchanged in {status['seconds']:.1f}s")
+            else:
+                print(f"❌ [{done}/{len(order)}] {status['name']}: {status['error']} "
+                      f"(see {Path(status['output_directory']) / JOB_LOG_NAME})")
+    return statuses
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert many ChatGPT exports in one run.")
+    parser.add_argument("jobs", help="Job file (JSON) listing the exports to convert")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Jobs converted at the same time (default: number of CPUs)")
+    parser.add_argument("--report", default="batch-report.json", help="Where to write the aggregate report")
+    args = parser.parse_args(argv)
+
+    try:
+        jobs = load_jobs(args.jobs)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+    print(f"📦 Converting {len(jobs)} export(s) on {args.workers} process(es)...")
+    start = time.perf_counter()
+    statuses = run_batch(jobs, max(1, args.workers))
+    totals = aggregate(statuses)
+
+    report = {
+        'finished': datetime.now().isoformat(timespec='seconds'),
+        'total_seconds': round(time.perf_counter() - start, 3),
+        'workers': args.workers,
+        'totals': totals,
+        'jobs': statuses,
+    }
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n📊 {totals['ok']} of {totals['jobs']} job(s) succeeded in {report['total_seconds']:.1f}s; "
+          f"report: {args.report}")
+    if totals['failed']:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Benchmark the conversion pipeline on a synthetic export.
+
+Times (and optionally memory-profiles) each stage end to end, writes the
+results as JSON, and compares them against a stored baseline. Also checks
+that converting straight from the export ZIP gives the same files as
+converting the extracted folder; the run fails if it does not.
+
+Usage:
+    python benchmark.py [--conversations N] [--messages M] [--layout sharded|legacy]
+                        [--memory] [--output results.json]
+                        [--baseline baseline.json] [--save-baseline baseline.json]
+                        [--max-memory-mb MB]
+
+With --max-memory-mb, only one conversion runs, with that max_memory_mb
+set, and the run fails if the converter's measured peak went over it.
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+from synthetic_export import generate_export
+from extract_zip import extract_chatgpt_zip
+from chatgpt_json_to_markdown import open_export, convert_export, process_conversations
+from json_backend import JSON_BACKEND
+
+DEFAULT_CONFIG = {
+    "user_name": "User",
+    "assistant_name": "ChatGPT",
+    "organization_mode": "hybrid",
+    "starred_folder": "Starred",
+    "archived_folder": "Archived",
+    "regular_folder": "Regular",
+    "date_folder_format": "YYYY/MM-Month",
+    "separate_assets_by_type": True,
+    "use_frontmatter": True,
+    "use_obsidian_callouts": True,
+    "date_format": "%m-%d-%Y",
+    "file_name_format": "{title}",
+    "include_date": True,
+    "message_separator": "\n\n",
+    "skip_empty_messages": True,
+    "extract_assets": True,
+}
+
+def _peak_rss_mb():
+    """Peak resident set size of this process so far, where the platform reports it."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def output_differences(left, right):
+    """
+    Relative paths of files that differ between two output folders, or
+    exist in only one. The manifest, journal, caches and run reports are
+    left out, since they record paths and timings rather than output.
+    """
+    def files(base):
+        return {
+            path.relative_to(base).as_posix(): path
+            for path in Path(base).rglob('*')
+            if path.is_file() and not path.name.startswith(('.c2md', 'run-'))
+        }
+
+    left_files, right_files = files(left), files(right)
+    differences = sorted(set(left_files) ^ set(right_files))
+    for rel_path in sorted(set(left_files) & set(right_files)):
+        if left_files[rel_path].read_bytes() != right_files[rel_path].read_bytes():
+            differences.append(rel_path)
+    return differences
+
+def run_stage(name, func, results, trace_memory=False):
+    """Run one stage, recording wall time and (optionally) peak Python allocations."""
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    # Keep the converter's prints and progress bars out of the timing table
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        value = func()
+    seconds = time.perf_counter() - start
+
+    stage = {'seconds': round(seconds, 4)}
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stage['peak_alloc_mb'] = round(peak / (1024 * 1024), 2)
+    stage['peak_rss_mb'] = _peak_rss_mb()
+
+    results['stages'][name] = stage
+    print(f"   {name:<32} {seconds:8.3f}s" + (f"  {stage['peak_alloc_mb']:8.1f} MB" if trace_memory else ""))
+    return value
+
+def run_benchmarks(args, work_dir):
+    work_dir = Path(work_dir)
+    export_dir = work_dir / "export"
+
+    results = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'json_backend': JSON_BACKEND,
+        'params': {
+            'conversations': args.conversations,
+            'messages': args.messages,
+            'layout': args.layout,
+            'workers': args.workers,
+            'memory': args.memory,
+        },
+        'stages': {},
+    }
+
+    print("📊 Generating synthetic export...")
+    results['export'] = generate_export(
+        export_dir,
+        conversations=args.conversations,
+        messages=args.messages,
+        layout=args.layout,
+        image_ratio=args.image_ratio,
+        audio_ratio=args.audio_ratio,
+        dalle_ratio=args.dalle_ratio,
+        seed=args.seed,
+        make_zip=True,
+    )
+
+    config = dict(DEFAULT_CONFIG, input_path=str(export_dir), input_mode='directory', workers=args.workers)
+
+    def load():
+        return sum(1 for _ in open_export(export_dir, 'directory', args.workers)[0])
+
+    def convert(output_dir, extra=None, full=False):
+        run_config = dict(config, output_directory=str(output_dir), **(extra or {}))
+        return lambda: process_conversations(
+            open_export(export_dir, 'directory', args.workers)[0], str(output_dir), run_config, str(export_dir),
+            full=full
+        )
+
+    print(f"⏱️  Running stages (JSON backend: {JSON_BACKEND})...")
+    run_stage('extract_chatgpt_zip', lambda: extract_chatgpt_zip(results['export']['zip'], work_dir / "extracted"),
+              results, args.memory)
+    run_stage('load_conversation_data', load, results, args.memory)
+    run_stage('process_conversations', convert(work_dir / "out"), results, args.memory)
+    run_stage('process_conversations_rerun', convert(work_dir / "out"), results, args.memory)
+    run_stage('process_conversations_no_assets', convert(work_dir / "out_text", {'extract_assets': False}),
+              results, args.memory)
+
+    # The same export read straight from its ZIP must convert to the same files.
+    # Written to a folder also called "out", since asset links include that name.
+    zip_path = results['export']['zip']
+    zip_out = work_dir / "zip" / "out"
+
+    def convert_zip():
+        data, input_base = open_export(zip_path, 'zip', args.workers)
+        zip_config = dict(config, input_path=str(zip_path), input_mode='zip', output_directory=str(zip_out))
+        return process_conversations(data, str(zip_out), zip_config, str(input_base))
+
+    run_stage('process_conversations_zip', convert_zip, results, args.memory)
+    differences = output_differences(work_dir / "out", zip_out)
+    results['zip_output_differences'] = differences[:20]
+    if differences:
+        print(f"   ❌ ZIP input produced {len(differences)} different file(s), e.g. {differences[0]}")
+    else:
+        print("   ✅ ZIP input produced identical output")
+
+    return results
+
+def run_memory_cap(args, work_dir):
+    """
+    Convert a synthetic export with max_memory_mb set, the way the command
+    line does (convert_export), and check that memory stayed under the cap.
+    Two peaks are checked: the MemoryBudget's, which includes worker
+    processes but is sampled once per batch, and this process's own peak
+    RSS, which is exact but leaves workers out.
+    """
+    work_dir = Path(work_dir)
+    export_dir = work_dir / "export"
+    results = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'json_backend': JSON_BACKEND,
+        'params': {
+            'conversations': args.conversations,
+            'messages': args.messages,
+            'layout': args.layout,
+            'workers': args.workers,
+            'max_memory_mb': args.max_memory_mb,
+        },
+        'stages': {},
+    }
+
+    print("📊 Generating synthetic export...")
+    results['export'] = generate_export(
+        export_dir,
+        conversations=args.conversations,
+        messages=args.messages,
+        layout=args.layout,
+        image_ratio=args.image_ratio,
+        audio_ratio=args.audio_ratio,
+        dalle_ratio=args.dalle_ratio,
+        seed=args.seed,
+    )
+    print(f"   {results['export']['json_bytes'] / (1024 * 1024):.0f} MB of conversation JSON")
+
+    config = dict(
+        DEFAULT_CONFIG, input_path=str(export_dir), input_mode='directory', output_directory=str(work_dir / "out"),
+        workers=args.workers, max_memory_mb=args.max_memory_mb,
+    )
+    print(f"⏱️  Converting with max_memory_mb={args.max_memory_mb}...")
+    stats = run_stage('process_conversations_capped', lambda: convert_export(config), results)
+
+    peaks = {
+        'budget_peak_memory_mb': stats.get('peak_memory_mb'),
+        'process_peak_rss_mb': results['stages']['process_conversations_capped']['peak_rss_mb'],
+    }
+    results['memory_cap'] = dict(
+        peaks,
+        max_memory_mb=args.max_memory_mb,
+        memory_checks=stats.get('memory_checks', 0),
+        memory_throttles=stats.get('memory_throttles', 0),
+        conversations=stats.get('rendered', 0),
+    )
+    over = [name for name, peak in peaks.items() if peak is not None and peak > args.max_memory_mb]
+    results['memory_cap']['within_cap'] = not over
+    for name, peak in peaks.items():
+        marker = "❌" if name in over else "✅"
+        shown = f"{peak:.0f} MB" if peak is not None else "not measured"
+        print(f"   {marker} {name:<30} {shown} (cap {args.max_memory_mb} MB)")
+    return results
+
+def compare(results, baseline, tolerance):
+    """
+    Compare stage times against a baseline.
+    Returns a list of stage names that got slower than the tolerance allows.
+    """
+    regressions = []
+    print(f"\n📈 Compared with baseline from {baseline.get('timestamp', 'unknown')}:")
+    if baseline.get('params') != results['params']:
+        print(f"   ⚠️  Baseline was run with different parameters: {baseline.get('params')}")
+    if baseline.get('json_backend', 'json') != results['json_backend']:
+        print(f"   ⚠️  Baseline used the {baseline.get('json_backend', 'json')} JSON backend, this run {results['json_backend']}")
+    for name, stage in results['stages'].items():
+        base_stage = baseline.get('stages', {}).get(name)
+        if not base_stage or not base_stage.get('seconds'):
+            print(f"      {name:<32} (no baseline)")
+            continue
+        ratio = stage['seconds'] / base_stage['seconds']
+        marker = "❌" if ratio > 1 + tolerance else ("✅" if ratio < 1 - tolerance else "  ")
+        print(f"   {marker} {name:<32} {base_stage['seconds']:8.3f}s -> {stage['seconds']:8.3f}s  ({ratio - 1:+.1%})")
+        stage['baseline_seconds'] = base_stage['seconds']
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ChatGPT-to-markdown conversion pipeline.")
+    parser.add_argument("--conversations", type=int, default=500)
+    parser.add_argument("--messages", type=int, default=40, help="Messages per conversation")
+    parser.add_argument("--layout", choices=['sharded', 'legacy'], default='sharded')
+    parser.add_argument("--image-ratio", type=float, default=0.1)
+    parser.add_argument("--audio-ratio", type=float, default=0.03)
+    parser.add_argument("--dalle-ratio", type=float, default=0.02)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--memory", action="store_true", help="Track peak allocations with tracemalloc (slower)")
+    parser.add_argument("--work-dir", help="Keep generated files here instead of a temp folder")
+    parser.add_argument("--output", default="benchmark-results.json", help="Where to write the JSON results")
+    parser.add_argument("--baseline", help="Baseline results JSON to compare against")
+    parser.add_argument("--save-baseline", help="Also write the results to this baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Allowed slowdown vs. baseline before a stage counts as a regression")
+    parser.add_argument("--max-memory-mb", type=int,
+                        help="Only run a conversion with this max_memory_mb and fail if memory went over it")
+    args = parser.parse_args(argv)
+    run = run_memory_cap if args.max_memory_mb else run_benchmarks
+
+    if args.work_dir:
+        work_dir = Path(args.work_dir)
+        if work_dir.exists():
+            shutil.rmtree(work_dir)
+        work_dir.mkdir(parents=True)
+        results = run(args, work_dir)
+    else:
+        with tempfile.TemporaryDirectory(prefix="c2md-bench-") as tmp:
+            results = run(args, tmp)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        results['regressions'] = regressions
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n📝 Results written to: {args.output}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"📌 Baseline saved to: {args.save_baseline}")
+
+    if not results.get('memory_cap', {}).get('within_cap', True):
+        print(f"❌ Memory went over max_memory_mb ({args.max_memory_mb} MB)")
+        sys.exit(1)
+    if results.get('zip_output_differences'):
+        print("❌ Output from the ZIP differs from output from the extracted folder")
+        sys.exit(1)
+    if regressions:
+        print(f"❌ Regressions: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,67 @@
-import json
+import argparse
+import cProfile
+import json_backend
+import pstats
+import time
 import os
 import sys
 import glob
 import shutil
 import re
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
 from datetime import datetime
 from tqdm import tqdm
 from pathlib import Path
-from organize import get_conversation_path, get_asset_path, get_relative_asset_path
+from json_stream import ConversationStream
+from extract_zip import (
+    ZipMember, is_zip_file, list_zip_conversations, iter_zip_export_files, copy_zip_member, forget_open_zips
+)
+from asset_store import AssetStore
+from run_report import RunMetrics, write_run_report
+from search_index import open_search_index
+from export_cache import open_export_cache, export_cache_name
+from archive_output import ArchiveOutput
+from write_behind import WriteBehind, write_text_if_changed, write_pieces_if_changed
+from journal import JOURNAL_NAME, Journal, load_journal
+from selection import compile_selection
+from merge_exports import MergedExports
+from message_model import compact_conversation
+from memory_budget import MemoryBudget, whole_file_limit
+from manifest import (
+    config_fingerprint, load_manifest, save_manifest, shared_output_paths, OutputPathClaims,
+    is_up_to_date, make_record, record_paths, count_record_paths, relative_output_path
+)
+from organize import (
+    get_conversation_path, get_conversation_category, get_asset_path, get_relative_asset_path,
+    plan_output_directories, OutputDirectories
+)
+
+FILE_SERVICE_PATTERN = re.compile(r'file-service://(file-[\w-]+)')
+SEDIMENT_PATTERN = re.compile(r'sediment://(file_[\w]+)')
+
+# Everything _strip_asset_references removes, as one alternation:
+# markdown image embeds, HTML5 audio/video embeds, and markdown links to assets.
+# A link never starts at '[![' so an image nested in link text is removed as
+# an image first, as it was when these were separate passes.
+ASSET_REFERENCE_PATTERN = re.compile(
+    r'!\[[^\]]*\]\([^\)]*\)'
+    r'|<audio[^>]*>.*?</audio>'
+    r'|<video[^>]*>.*?</video>'
+    r'|\[(?!!\[)[^\]]*\]\('
+    r'(?:[^\)]*\.(?:png|jpg|jpeg|gif|webp|bmp|svg|wav|mp3|m4a|ogg|mp4|webm)'
+    r'|file-service://[^\)]+'
+    r'|sediment://[^\)]+'
+    r'|sandbox:/mnt/data/[^\)]+)'
+    r'\)',
+    re.IGNORECASE | re.DOTALL
+)
+EXCESS_NEWLINES_PATTERN = re.compile(r'\n{3,}')
+WHITESPACE_PATTERN = re.compile(r'\s+')
 
 def read_json_file(file_path):
-    with open(file_path, 'r', encoding='utf-8') as file:
-        data = json.load(file)
-    return data
+    return json_backend.load_file(file_path)
 
 def extract_file_id(asset_pointer):
     """
@@ -26,27 +75,136 @@ def extract_file_id(asset_pointer):
         return None
 
     # Match file-service:// format (images)
-    match = re.search(r'file-service://(file-[\w-]+)', asset_pointer)
+    match = FILE_SERVICE_PATTERN.search(asset_pointer)
     if match:
         return match.group(1)
 
     # Match sediment:// format (audio)
-    match = re.search(r'sediment://(file_[\w]+)', asset_pointer)
+    match = SEDIMENT_PATTERN.search(asset_pointer)
     if match:
         return match.group(1)
 
     return None
 
-def find_attachment_file(file_id, input_base_path):
+def _attachment_file_type(file_path):
+    """Classify an attachment path as 'dalle', 'audio' or 'image'."""
+    if "dalle-generations" in file_path:
+        return "dalle"
+    if "/audio/" in file_path or "\\audio\\" in file_path:
+        return "audio"
+    return "image"
+
+def _attachment_id_candidates(filename, allow_bare_prefix=False):
+    """
+    Yield the file IDs a filename could belong to.
+    Export files are named '{file_id}-{original name}', and IDs may themselves
+    contain dashes, so every prefix ending before a '-' is a candidate.
+    user-* folders also match '{file_id}{anything}', so the stem is included there.
+    """
+    for i, char in enumerate(filename):
+        if char == '-' and i > 5:
+            yield filename[:i]
+    if allow_bare_prefix:
+        yield filename
+        stem = filename.split('.', 1)[0]
+        if stem != filename:
+            yield stem
+
+def _build_zip_attachment_index(zip_path):
+    """
+    Build the attachment index from a ZIP's central directory, without
+    extracting anything. Values are (ZipMember, file_type).
+    """
+    groups = {'root': [], 'dalle': [], 'user': [], 'audio': []}
+    for parts, member in iter_zip_export_files(zip_path):
+        filename = parts[-1]
+        if not filename.startswith('file'):
+            continue
+        if len(parts) == 1:
+            groups['root'].append(member)
+        elif len(parts) == 2 and parts[0] == 'dalle-generations':
+            groups['dalle'].append(member)
+        elif len(parts) == 2 and parts[0].startswith('user-'):
+            groups['user'].append(member)
+        elif parts[-2] == 'audio':
+            groups['audio'].append(member)
+
+    # Same precedence as the directory scan: root, DALL-E, user files, audio
+    index = {}
+    for group in ('root', 'dalle', 'user', 'audio'):
+        for member in sorted(groups[group], key=lambda m: m.name):
+            file_type = _attachment_file_type('/' + member.name)
+            filename = member.name.rsplit('/', 1)[-1]
+            for file_id in _attachment_id_candidates(filename, allow_bare_prefix=(group == 'user')):
+                index.setdefault(file_id, (member, file_type))
+    return index
+
+def build_attachment_index(input_base_path):
+    """
+    Scan the export directory once and map file IDs to attachment files.
+    Covers the same locations as find_attachment_file's glob patterns:
+    root, dalle-generations/, user-*/ and any */audio/ folder.
+    input_base_path may also be an export ZIP, indexed from its central directory.
+    Returns: dict of file_id -> (file_path or ZipMember, file_type)
+    """
+    base_path = Path(input_base_path)
+    index = {}
+    if is_zip_file(base_path):
+        return _build_zip_attachment_index(base_path)
+    if not base_path.is_dir():
+        return index
+
+    def add_files(directory, allow_bare_prefix=False):
+        try:
+            entries = sorted(os.scandir(directory), key=lambda e: e.name)
+        except OSError:
+            return
+        for entry in entries:
+            if not entry.name.startswith('file') or not entry.is_file():
+                continue
+            file_path = str(Path(directory) / entry.name)
+            file_type = _attachment_file_type(file_path.replace('\\', '/'))
+            for file_id in _attachment_id_candidates(entry.name, allow_bare_prefix):
+                index.setdefault(file_id, (file_path, file_type))
+
+    # Same precedence as the glob patterns: root, DALL-E, user files, audio
+    add_files(base_path)
+    add_files(base_path / 'dalle-generations')
+    for user_dir in sorted(base_path.glob('user-*')):
+        if user_dir.is_dir():
+            add_files(user_dir, allow_bare_prefix=True)
+    for dir_path, dir_names, _ in os.walk(base_path):
+        dir_names.sort()
+        if Path(dir_path).name == 'audio' and Path(dir_path) != base_path:
+            add_files(dir_path)
+
+    return index
+
+def build_merged_attachment_index(input_base_paths):
+    """
+    Union of the attachment indexes of several exports.
+    A file ID found in more than one export resolves to the later export.
+    """
+    index = {}
+    for input_base_path in input_base_paths:
+        index.update(build_attachment_index(input_base_path))
+    return index
+
+def find_attachment_file(file_id, input_base_path, attachment_index=None):
     """
     Find the actual file matching the file_id in the JsonFiles directory.
     Searches in root, dalle-generations, user-*, and UUID/audio/ subdirectories.
+    When attachment_index (from build_attachment_index) is given, this is a
+    dictionary lookup instead of a filesystem scan.
     Returns: (file_path, file_type) or (None, None)
     file_type can be: 'image', 'dalle', 'audio'
     """
     if not file_id:
         return None, None
 
+    if attachment_index is not None:
+        return attachment_index.get(file_id, (None, None))
+
     # Normalize path for glob (forward slashes work on all platforms)
     base_path = str(Path(input_base_path)).replace('\\', '/')
 
@@ -62,18 +220,11 @@ def find_attachment_file(file_id, input_base_path):
         matches = glob.glob(pattern, recursive=True)
         if matches:
             file_path = matches[0]
-            # Determine file type
-            if "dalle-generations" in file_path:
-                file_type = "dalle"
-            elif "/audio/" in file_path or "\\audio\\" in file_path:
-                file_type = "audio"
-            else:
-                file_type = "image"
-            return file_path, file_type
+            return file_path, _attachment_file_type(file_path)
 
     return None, None
 
-def copy_attachment(src_path, output_base, file_type, filename, config, conversation_path):
+def copy_attachment(src_path, output_base, file_type, filename, config, conversation_path, asset_copies=None):
     """
     Copy attachment file to organized Assets directory.
 
@@ -84,28 +235,48 @@ def copy_attachment(src_path, output_base, file_type, filename, config, conversa
         filename: Filename to use
         config: Configuration dict
         conversation_path: Path where the markdown file will be saved
+        asset_copies: Optional list; when given, the (source, target) pair is
+            appended to it and the copy is left to the caller
 
     Returns: relative path for markdown embedding
     """
-    if not src_path or not Path(src_path).exists():
+    if not src_path:
+        return None
+    if not isinstance(src_path, ZipMember) and not Path(src_path).exists():
         return None
 
     # Get organized asset path
     asset_dir = get_asset_path(output_base, file_type, config)
-    asset_dir.mkdir(parents=True, exist_ok=True)
 
     # Use the original filename (already includes file-ID)
-    safe_filename = filename if filename else Path(src_path).name
+    safe_filename = filename if filename else _asset_filename(src_path)
     target_path = asset_dir / safe_filename
 
-    # Copy file if it doesn't exist (avoids duplicates)
-    if not target_path.exists():
-        shutil.copy2(src_path, target_path)
+    if asset_copies is not None:
+        asset_copies.append((src_path, str(target_path)))
+    else:
+        _copy_if_missing(src_path, target_path)
 
     # Return relative path for markdown (from conversation file to asset)
     rel_path = get_relative_asset_path(conversation_path, target_path)
     return rel_path
 
+def _asset_filename(src_path):
+    """Filename of an attachment on disk or inside the export ZIP."""
+    if isinstance(src_path, ZipMember):
+        return src_path.name.rsplit('/', 1)[-1]
+    return Path(src_path).name
+
+def _copy_if_missing(src_path, target_path):
+    """Copy src_path to target_path unless the target already exists (avoids duplicates)."""
+    target_path = Path(target_path)
+    if not target_path.exists():
+        target_path.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(src_path, ZipMember):
+            copy_zip_member(src_path, target_path)
+        else:
+            shutil.copy2(src_path, target_path)
+
 def _strip_asset_references(text):
     """
     Remove markdown/html references to local/exported assets.
@@ -114,45 +285,93 @@ def _strip_asset_references(text):
     if not text:
         return text
 
-    # Remove markdown image embeds
-    text = re.sub(r'!\[[^\]]*\]\([^\)]*\)', '', text)
-
-    # Remove HTML5 audio/video embeds
-    text = re.sub(r'<audio[^>]*>.*?</audio>', '', text, flags=re.IGNORECASE | re.DOTALL)
-    text = re.sub(r'<video[^>]*>.*?</video>', '', text, flags=re.IGNORECASE | re.DOTALL)
-
-    # Remove markdown links that point to assets
-    asset_link_pattern = (
-        r'\[[^\]]*\]\('
-        r'(?:[^\)]*\.(?:png|jpg|jpeg|gif|webp|bmp|svg|wav|mp3|m4a|ogg|mp4|webm)'
-        r'|file-service://[^\)]+'
-        r'|sediment://[^\)]+'
-        r'|sandbox:/mnt/data/[^\)]+)'
-        r'\)'
-    )
-    text = re.sub(asset_link_pattern, '', text, flags=re.IGNORECASE)
+    # One combined pass; skipped entirely for text that can't contain a reference
+    if '](' in text or '<' in text:
+        text = ASSET_REFERENCE_PATTERN.sub('', text)
 
     # Clean excessive empty lines
-    text = re.sub(r'\n{3,}', '\n\n', text)
+    if '\n\n\n' in text:
+        text = EXCESS_NEWLINES_PATTERN.sub('\n\n', text)
     return text.strip()
 
+def _keep_text(text):
+    return text
+
+RenderPlan = namedtuple('RenderPlan', [
+    'user_name',
+    'assistant_name',
+    'extract_assets',
+    'use_callouts',
+    'use_frontmatter',
+    'include_date',
+    'date_format',
+    'skip_empty_messages',
+    'message_separator',
+    'branch_mode',
+    'clean_text',
+    'max_file_bytes',
+    'max_messages_per_file',
+])
+
+def compile_render_plan(config):
+    """
+    Resolve the config options used while rendering once per run, so the
+    per-message code reads attributes instead of calling config.get(...).
+    """
+    extract_assets = config.get('extract_assets', True)
+    return RenderPlan(
+        user_name=config.get('user_name', 'User'),
+        assistant_name=config.get('assistant_name', 'ChatGPT'),
+        extract_assets=extract_assets,
+        use_callouts=config.get('use_obsidian_callouts', True),
+        use_frontmatter=config.get('use_frontmatter', True),
+        include_date=config.get('include_date', True),
+        date_format=config.get('date_format', '%m-%d-%Y'),
+        skip_empty_messages=config.get('skip_empty_messages', True),
+        message_separator=config.get('message_separator', '\n\n'),
+        branch_mode=config.get('branch_mode', 'active'),
+        clean_text=_keep_text if extract_assets else _strip_asset_references,
+        max_file_bytes=int(float(config.get('max_file_size_kb') or 0) * 1024) or None,
+        max_messages_per_file=int(config.get('max_messages_per_file') or 0) or None,
+    )
+
+def _render_plan(config, context=None):
+    """The run's RenderPlan from context, compiling one from config if there is none."""
+    plan = context.get('plan') if context else None
+    return plan if plan is not None else compile_render_plan(config)
+
+def _resolve_attachment(file_id, input_base_path, context):
+    """find_attachment_file using the run's attachment index, timed in the run metrics."""
+    metrics = context.get('metrics')
+    if metrics is None:
+        return find_attachment_file(file_id, input_base_path, context.get('attachment_index'))
+    with metrics.timed('attachment_resolution'):
+        return find_attachment_file(file_id, input_base_path, context.get('attachment_index'))
 
-def _process_message_parts(parts, input_base_path, output_base, config, conversation_path):
+def _process_message_parts(parts, input_base_path, output_base, config, conversation_path, context=None):
     """
     Process message parts, handling both text and image_asset_pointer types.
+    context is the per-run state from _new_render_context (attachment index,
+    stats, deferred asset copies).
     Returns: (formatted_content, list_of_attachment_paths)
     """
     if not parts:
         return "", []
 
-    extract_assets = config.get('extract_assets', True)
+    context = context or {}
+    stats = context.get('stats')
+    asset_copies = context.get('asset_copies')
+
+    plan = _render_plan(config, context)
+    extract_assets = plan.extract_assets
+    clean_text = plan.clean_text
     content_pieces = []
     attachments = []
 
     for part in parts:
         if isinstance(part, str):
             # Regular text content
-            content_pieces.append(_strip_asset_references(part) if not extract_assets else part)
+            content_pieces.append(clean_text(part))
         elif isinstance(part, dict):
             content_type = part.get('content_type', '')
 
@@ -165,10 +384,13 @@ def _process_message_parts(parts, input_base_path, output_base, config, conversa
                 file_id = extract_file_id(asset_pointer)
 
                 if file_id:
-                    src_path, file_type = find_attachment_file(file_id, input_base_path)
+                    src_path, file_type = _resolve_attachment(file_id, input_base_path, context)
+                    if not src_path and stats is not None:
+                        stats['unresolved_attachments'] += 1
                     if src_path:
-                        filename = Path(src_path).name
-                        rel_path = copy_attachment(src_path, output_base, file_type, filename, config, conversation_path)
+                        filename = _asset_filename(src_path)
+                        rel_path = copy_attachment(src_path, output_base, file_type, filename, config,
+                                                   conversation_path, asset_copies)
                         if rel_path:
                             attachments.append(rel_path)
                             # Add image embed in markdown
@@ -196,10 +418,13 @@ def _process_message_parts(parts, input_base_path, output_base, config, conversa
                 if asset_pointer:
                     file_id = extract_file_id(asset_pointer)
                     if file_id:
-                        src_path, file_type = find_attachment_file(file_id, input_base_path)
+                        src_path, file_type = _resolve_attachment(file_id, input_base_path, context)
+                        if not (src_path and file_type == 'audio') and stats is not None:
+                            stats['unresolved_attachments'] += 1
                         if src_path and file_type == 'audio':
-                            filename = Path(src_path).name
-                            rel_path = copy_attachment(src_path, output_base, file_type, filename, config, conversation_path)
+                            filename = _asset_filename(src_path)
+                            rel_path = copy_attachment(src_path, output_base, file_type, filename, config,
+                                                       conversation_path, asset_copies)
                             if rel_path:
                                 attachments.append(rel_path)
                                 # Embed audio with HTML5 audio tag
@@ -215,8 +440,7 @@ def _process_message_parts(parts, input_base_path, output_base, config, conversa
 
             elif 'text' in part:
                 # Text content in dict format
-                text_value = part['text']
-                content_pieces.append(_strip_asset_references(text_value) if not extract_assets else text_value)
+                content_pieces.append(clean_text(part['text']))
             else:
                 # Unknown dict format - skip to avoid cluttering output
                 # (previously this would dump the entire dict as a string)
@@ -229,92 +453,97 @@ def _process_message_parts(parts, input_base_path, output_base, config, conversa
     content = "\n".join(filter(None, content_pieces))
     return content, attachments
 
-def _get_message_content(message, input_base_path, output_base, config, conversation_path):
+def _render_reasoning_recap(content_obj, plan):
+    # Handle reasoning recap messages
+    recap_text = content_obj.get('content', 'Reasoning completed')
+    if plan.use_callouts:
+        return f"> [!info] Reasoning Summary\n> {recap_text}"
+    return f"*{recap_text}*"
+
+def _render_thoughts(content_obj, plan):
+    # Handle ChatGPT's internal reasoning/thoughts format
+    thought_lines = []
+    for thought in content_obj.get("thoughts") or []:
+        if isinstance(thought, dict):
+            summary = thought.get('summary', 'Thought')
+            thought_content = thought.get('content', '')
+            thought_lines.append(f"**{summary}**: {thought_content}")
+
+    content = "\n".join(thought_lines)
+    if plan.use_callouts and content:
+        content = f"> [!note] Internal Reasoning\n> " + content.replace("\n", "\n> ")
+    return content
+
+def _render_user_context(content_obj, plan):
+    # Handle user context/profile messages
+    profile = content_obj.get("user_profile", "")
+    instructions = content_obj.get("user_instructions", "")
+    content = f"*User Context*:\n{profile}\n{instructions}".strip()
+    if plan.use_callouts:
+        content = f"> [!abstract] User Context\n> " + content.replace("\n", "\n> ")
+    return content
+
+def _render_code(content_obj, plan):
+    # Handle code content
+    code_text = content_obj.get('text', content_obj.get('content', ''))
+    return f"```\n{code_text}\n```"
+
+def _render_other_content(content_obj, plan):
+    if "text" in content_obj:
+        return plan.clean_text(content_obj["text"])
+    if "result" in content_obj:
+        return plan.clean_text(content_obj["result"])
+    # Unknown format, try to extract something useful
+    return plan.clean_text(str(content_obj.get('content', '')))
+
+# Renderers for message content without 'parts', keyed by content_type
+CONTENT_RENDERERS = {
+    'reasoning_recap': _render_reasoning_recap,
+    'thoughts': _render_thoughts,
+    'user_editable_context': _render_user_context,
+    'code': _render_code,
+}
+
+def _get_message_content(message, input_base_path, output_base, config, conversation_path, context=None):
     """
-    Extracts the content of a message from the message object,
+    Extracts the content of a message (a message_model.Message),
     with handling for various content types including multimodal (images).
     Returns: (content_text, attachment_paths)
     """
-    content_obj = message.get("content", {})
-    content_type = content_obj.get("content_type", "unknown")
-    extract_assets = config.get('extract_assets', True)
+    content_obj = message.content
 
     if "parts" in content_obj:
         parts = content_obj["parts"]
-        return _process_message_parts(parts, input_base_path, output_base, config, conversation_path)
-
-    elif content_type == "reasoning_recap":
-        # Handle reasoning recap messages
-        recap_text = content_obj.get('content', 'Reasoning completed')
-        if config.get('use_obsidian_callouts', True):
-            content = f"> [!info] Reasoning Summary\n> {recap_text}"
-        else:
-            content = f"*{recap_text}*"
-        return content, []
-
-    elif "thoughts" in content_obj:
-        # Handle ChatGPT's internal reasoning/thoughts format
-        thoughts = content_obj["thoughts"]
-        thought_lines = []
-        for thought in thoughts:
-            if isinstance(thought, dict):
-                summary = thought.get('summary', 'Thought')
-                thought_content = thought.get('content', '')
-                thought_lines.append(f"**{summary}**: {thought_content}")
-
-        content = "\n".join(thought_lines)
-        if config.get('use_obsidian_callouts', True) and content:
-            content = f"> [!note] Internal Reasoning\n> " + content.replace("\n", "\n> ")
-        return content, []
+        return _process_message_parts(parts, input_base_path, output_base, config, conversation_path, context)
 
-    elif content_type == "user_editable_context":
-        # Handle user context/profile messages
-        profile = content_obj.get("user_profile", "")
-        instructions = content_obj.get("user_instructions", "")
-        content = f"*User Context*:\n{profile}\n{instructions}".strip()
-        if config.get('use_obsidian_callouts', True):
-            content = f"> [!abstract] User Context\n> " + content.replace("\n", "\n> ")
-        return content, []
-
-    elif content_type == "code":
-        # Handle code content
-        code_text = content_obj.get('text', content_obj.get('content', ''))
-        return f"```\n{code_text}\n```", []
-
-    elif "text" in content_obj:
-        text_value = content_obj["text"]
-        return (_strip_asset_references(text_value) if not extract_assets else text_value), []
-
-    elif "result" in content_obj:
-        result_value = content_obj["result"]
-        return (_strip_asset_references(result_value) if not extract_assets else result_value), []
-
-    else:
-        # Unknown format, try to extract something useful
-        if isinstance(content_obj, dict):
-            raw_content = str(content_obj.get('content', ''))
-            return (_strip_asset_references(raw_content) if not extract_assets else raw_content), []
+    if not isinstance(content_obj, dict):
         return "", []
 
-def _get_author_name(message, config):
+    renderer = CONTENT_RENDERERS.get(content_obj.get("content_type", "unknown"))
+    if renderer is None:
+        renderer = _render_thoughts if "thoughts" in content_obj else _render_other_content
+    return renderer(content_obj, _render_plan(config, context)), []
+
+def _get_author_name(message, config, context=None):
     """
-    Determines the appropriate author name based on message type and role.
+    Determines the appropriate author name based on message type and role
+    (message is a message_model.Message).
     """
-    author_role = message.get("author", {}).get("role", "unknown")
-    base_name = config['user_name'] if author_role == "user" else config['assistant_name']
+    plan = _render_plan(config, context)
+    author_role = message.role
+    base_name = plan.user_name if author_role == "user" else plan.assistant_name
 
     # Handle tool messages
     if author_role == "tool":
-        tool_name = message.get("author", {}).get("name", "tool")
-        return f"Tool ({tool_name})"
+        return f"Tool ({message.name})"
 
     # Check for special content types
-    content = message.get("content", {})
-    recipient = message.get("recipient", "")
+    content = message.content
     content_type = content.get("content_type", "")
 
     # Tool call detection
     if content_type == "code":
+        recipient = message.recipient
         if recipient == "web":
             return f"{base_name} (tool call)"
         elif recipient == "web.run":
@@ -338,7 +567,7 @@ def _normalize_title(title):
         return "Untitled Conversation"
 
     normalized = str(title).replace('_', ' ')
-    normalized = re.sub(r'\s+', ' ', normalized).strip()
+    normalized = WHITESPACE_PATTERN.sub(' ', normalized).strip()
     return normalized or "Untitled Conversation"
 
 def generate_frontmatter(create_time, update_time, config):
@@ -366,156 +595,1020 @@ def generate_frontmatter(create_time, update_time, config):
 
     return "\n".join(lines)
 
-def _load_conversation_data(input_dir):
+def _load_conversation_data(input_dir, workers=1, whole_file_limit=None):
     """
-    Load conversation data from either:
+    Open conversation data from either:
     - legacy conversations.json
     - new sharded conversations-*.json files
+
+    With workers > 1, shards are decoded in parallel (in the same order).
+    whole_file_limit caps the size of a file decoded in one piece (see
+    ConversationStream).
+
+    Returns a ConversationStream that yields one conversation at a time,
+    or None if no conversation files exist.
     """
     input_dir = Path(input_dir)
 
     legacy = input_dir / 'conversations.json'
     if legacy.exists():
-        data = read_json_file(legacy)
-        if isinstance(data, list):
-            return data
-        return [data]
+        return ConversationStream([legacy], whole_file_limit=whole_file_limit)
 
     shard_files = sorted(input_dir.glob('conversations-*.json'))
     if shard_files:
-        combined = []
-        for shard in shard_files:
-            shard_data = read_json_file(shard)
-            if isinstance(shard_data, list):
-                combined.extend(shard_data)
-            elif isinstance(shard_data, dict):
-                combined.append(shard_data)
-        return combined
+        return ConversationStream(shard_files, workers=workers, whole_file_limit=whole_file_limit)
 
     return None
 
 
-def process_conversations(data, output_dir, config, input_base_path):
+def _format_bytes(count):
+    """Human-readable byte count for summaries."""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if count < 1024 or unit == 'GB':
+            return f"{count:.1f} {unit}" if unit != 'B' else f"{count} B"
+        count /= 1024
+
+def _iter_with_progress(entries, desc, source=None):
     """
-    Process all conversations and generate markdown files.
+    Wrap conversation data in a tqdm progress bar.
+    Streams report progress in bytes; lists report progress per conversation.
+    source is the underlying data when entries is a wrapper around it.
     """
-    output_base = Path(output_dir)
-    input_base = Path(input_base_path)
+    source = entries if source is None else source
+    if not hasattr(source, 'total_bytes'):
+        yield from tqdm(entries, desc=desc, total=len(source) if hasattr(source, '__len__') else None)
+        return
+
+    with tqdm(total=source.total_bytes, desc=desc, unit='B', unit_scale=True) as progress:
+        for entry in entries:
+            yield entry
+            progress.update(source.bytes_read - progress.n)
+        progress.update(source.bytes_read - progress.n)
+
+def _new_render_context(attachment_index, defer_asset_copies=False, plan=None, collect_search_rows=False):
+    """
+    Per-run state threaded through rendering: the attachment index, the
+    compiled RenderPlan, stats and metrics. With defer_asset_copies, copy_attachment records (source, target) pairs
+    in 'asset_copies' instead of copying, so a parallel worker can hand them
+    back to the parent process. With collect_search_rows, render_conversation
+    appends (author, create_time, content) for every written message to
+    'search_rows' for the search index.
+    """
+    return {
+        'attachment_index': attachment_index,
+        'stats': {'unresolved_attachments': 0},
+        'asset_copies': [] if defer_asset_copies else None,
+        'metrics': RunMetrics(),
+        'plan': plan,
+        'search_rows': [] if collect_search_rows else None,
+    }
+
+def conversation_file_path(entry, config, output_base):
+    """
+    Work out where a conversation's markdown file goes, without rendering it.
+    Returns: (file_path, display_title)
+    """
+    create_time = entry.get("create_time", None)
+
+    # Use conversation title and normalize for display/filename sync
+    inferred_title = _normalize_title(entry.get("title", None))
+
+    # Sanitize the title to ensure it's a valid filename
+    sanitized_title = ''.join(c for c in inferred_title if c.isalnum() or c in [' ', '-']).rstrip()
+    if not sanitized_title:
+        sanitized_title = f"conversation {int(create_time or 0)}"
+
+    # Get organized path for this conversation
+    conversation_dir = get_conversation_path(entry, config, output_base)
+
+    # Create filename
+    file_name = f"{config['file_name_format'].format(title=sanitized_title.replace('/', '-'))}.md"
+    return conversation_dir / file_name, inferred_title
+
+def _conversation_header(entry, title, date_line, plan, config):
+    """Frontmatter, title and date of a conversation's markdown file, up to its --- separator."""
+    header = []
+    if plan.use_frontmatter:
+        header.append(generate_frontmatter(entry.get("create_time", None), entry.get("update_time", None), config))
+    header.append(f"# {title}\n\n")
+    header.append(date_line)
+    header.append("---\n\n")
+    return "".join(header)
+
+def _iter_conversation_blocks(entry, file_path, output_base, config, input_base, context):
+    """
+    Render a conversation's messages one block at a time, in reading order.
 
-    for entry in tqdm(data, desc="Processing conversations"):
-        # Ensure each entry is a dictionary
-        if not isinstance(entry, dict):
-            print(f"Skipping entry, expected dict but got {type(entry).__name__}: {entry}")
+    Yields (kind, depth, text) for every written message ('message') and
+    alternate-branch marker ('open'/'close'). The first item is always
+    ('date', 0, line): the <sub>date</sub> line from the first visible
+    message, or "" without one. Branch markers met before that message
+    are held back until the date is known, so the header can go first.
+    """
+    plan = _render_plan(config, context)
+    use_callouts = plan.use_callouts
+    metrics = context.get('metrics') if context else None
+    search_rows = context.get('search_rows') if context else None
+    events = _iter_message_events(entry, plan.branch_mode)
+    if metrics is not None:
+        events = metrics.timed_iter(events, 'message_extraction')
+
+    held = []
+    for event in events:
+        kind, depth = event[0], event[1]
+        if kind != 'message':
+            text = _open_branch(depth, use_callouts) if kind == 'open' else _close_branch(depth, use_callouts)
+            if held is not None:
+                held.append((kind, depth, text))
+            else:
+                yield kind, depth, text
             continue
 
-        # Safely get the title and mapping
-        title = entry.get("title", None)
-        create_time = entry.get("create_time", None)
-        update_time = entry.get("update_time", None)
-        mapping = entry.get("mapping", {})
-
-        # Extract messages from the "mapping" key
-        messages = [
-            item["message"]
-            for item in mapping.values()
-            if isinstance(item, dict) and item.get("message") is not None
-        ]
+        message = event[2]
 
         # Filter out system messages that are hidden
-        messages = [
-            msg for msg in messages
-            if not msg.get("metadata", {}).get("is_visually_hidden_from_conversation", False)
-        ]
-
-        # Sort messages by their create_time, handling None values
-        messages.sort(key=lambda x: x.get("create_time") or float('-inf'))
-
-        # Use conversation title and normalize for display/filename sync
-        inferred_title = _normalize_title(title)
-
-        # Sanitize the title to ensure it's a valid filename
-        sanitized_title = ''.join(c for c in inferred_title if c.isalnum() or c in [' ', '-']).rstrip()
-        if not sanitized_title:
-            sanitized_title = f"conversation {int(create_time or 0)}"
-
-        # Get organized path for this conversation
-        conversation_dir = get_conversation_path(entry, config, output_base)
-        conversation_dir.mkdir(parents=True, exist_ok=True)
-
-        # Create filename
-        file_name = f"{config['file_name_format'].format(title=sanitized_title.replace('/', '-'))}.md"
-        file_path = conversation_dir / file_name
-
-        # Write messages to file
-        with open(file_path, "w", encoding="utf-8") as f:
-            # Write frontmatter
-            if config.get('use_frontmatter', True):
-                frontmatter = generate_frontmatter(create_time, update_time, config)
-                f.write(frontmatter)
-
-            # Write title
-            f.write(f"# {inferred_title}\n\n")
-
-            # Write date if configured
-            if messages and messages[0].get("create_time") and config.get('include_date', True):
-                date = datetime.fromtimestamp(messages[0]["create_time"]).strftime(config['date_format'])
-                f.write(f"<sub>{date}</sub>\n\n")
-
-            # Write separator
-            f.write("---\n\n")
-
-            # Write messages
-            for message in messages:
-                # Skip system messages
-                if message.get("author", {}).get("role") == "system":
-                    continue
+        if message.hidden:
+            continue
+
+        # Write date if configured
+        if held is not None:
+            date_line = ""
+            if message.create_time and plan.include_date:
+                date = datetime.fromtimestamp(message.create_time).strftime(plan.date_format)
+                date_line = f"<sub>{date}</sub>\n\n"
+            yield 'date', 0, date_line
+            yield from held
+            held = None
+
+        # Skip system messages
+        if message.role == "system":
+            continue
+
+        start = time.perf_counter()
+        content, attachments = _get_message_content(
+            message,
+            input_base,
+            output_base,
+            config,
+            file_path,
+            context
+        )
+        if metrics is not None:
+            metrics.add_time('message_content', time.perf_counter() - start)
+        author_name = _get_author_name(message, config, context)
+
+        if not plan.skip_empty_messages or content.strip():
+            # Write author and content
+            block = f"**{author_name}**:\n\n{content}{plan.message_separator}"
+            yield 'message', depth, _prefix_lines(block, _branch_prefix(depth, use_callouts))
+            if search_rows is not None:
+                search_rows.append((author_name, message.create_time, content))
+
+    if held is not None:
+        yield 'date', 0, ""
+        yield from held
+
+def part_file_path(file_path, number):
+    """Where part `number` of a split conversation goes: next to its index note."""
+    file_path = Path(file_path)
+    return file_path.with_name(f"{file_path.stem} - Part {number}{file_path.suffix}")
+
+def _split_blocks(blocks, max_bytes, max_messages):
+    """
+    Group message blocks into parts of at most max_bytes (UTF-8) and
+    max_messages messages each. Parts are only cut between top-level
+    blocks, never inside an alternate branch, so a part is larger than
+    max_bytes when a single message or branch is.
+    Yields (markdown_body, message_count) per part.
+    """
+    part, part_bytes, part_messages, open_branches = [], 0, 0, 0
+    for kind, depth, text in blocks:
+        size = len(text.encode('utf-8')) if max_bytes else 0
+        if part_messages and open_branches == 0 and (
+            (max_bytes and part_bytes + size > max_bytes)
+            or (max_messages and kind == 'message' and part_messages >= max_messages)
+        ):
+            yield "".join(part), part_messages
+            part, part_bytes, part_messages = [], 0, 0
+        part.append(text)
+        part_bytes += size
+        if kind == 'message':
+            part_messages += 1
+        elif kind == 'open':
+            open_branches += 1
+        elif kind == 'close':
+            open_branches -= 1
+    yield "".join(part), part_messages
+
+def _part_link(file_path, label):
+    return f"[{label}](<{Path(file_path).name}>)"
+
+def render_conversation_parts(entry, output_base, config, input_base, context, split=True, write=None,
+                              file_path=None):
+    """
+    Render one conversation to markdown, at file_path when given (a path
+    claimed through OutputPathClaims) or else where conversation_file_path puts it.
+
+    Message blocks are streamed from the message tree. With write, each
+    file goes to write(file_path, pieces) as soon as it is complete: an
+    unsplit conversation block by block while it renders, a part as soon
+    as it is cut. At most one part is then held in memory, however long
+    the conversation. Without write (render workers, archives) nothing
+    touches the output tree and the markdown is returned.
+
+    With config['max_file_size_kb'] or config['max_messages_per_file'] (and
+    split), a conversation over either limit becomes numbered part files
+    ("<name> - Part N.md", see part_file_path). Each links back to an
+    index note, written last at the conversation's usual path.
+
+    Returns: list of (file_path, markdown_text, or None once written): any
+    parts in order, then the conversation's own file (the index note when
+    split). None if the entry is not a conversation.
+    """
+    # Ensure each entry is a dictionary
+    if not isinstance(entry, dict):
+        print(f"Skipping entry, expected dict but got {type(entry).__name__}: {entry}")
+        return None
+    entry = compact_conversation(entry)
+
+    default_path, inferred_title = conversation_file_path(entry, config, output_base)
+    file_path = default_path if file_path is None else Path(file_path)
+    plan = _render_plan(config, context)
+
+    blocks = _iter_conversation_blocks(entry, file_path, output_base, config, input_base, context)
+    _, _, date_line = next(blocks)
+    header = _conversation_header(entry, inferred_title, date_line, plan, config)
+
+    def emit(path, pieces):
+        if write is not None:
+            write(path, pieces)
+            return path, None
+        return path, "".join(pieces)
+
+    max_bytes = plan.max_file_bytes if split else None
+    max_messages = plan.max_messages_per_file if split else None
+    if not max_bytes and not max_messages:
+        return [emit(file_path, chain((header,), (text for _, _, text in blocks)))]
+
+    def part_header(number, is_last):
+        links = [_part_link(file_path, inferred_title)]
+        if number > 1:
+            links.append(_part_link(part_file_path(file_path, number - 1), "← Previous part"))
+        if not is_last:
+            links.append(_part_link(part_file_path(file_path, number + 1), "Next part →"))
+        title = f"{inferred_title} (part {number})"
+        return f"{_conversation_header(entry, title, date_line, plan, config)}{' · '.join(links)}\n\n"
+
+    if max_bytes:
+        # Leave room for the header and navigation links of a part in the middle
+        max_bytes = max(1, max_bytes - len(part_header(999, False).encode('utf-8')))
+
+    # A part is written once the next one has started, so it knows whether it is the last
+    parts = _split_blocks(blocks, max_bytes, max_messages)
+    body, message_count = next(parts)
+    rendered = []
+    contents = []
+    for following in chain(parts, [None]):
+        if following is None and not rendered:
+            # Within the limits after all: a single file
+            return [emit(file_path, (header, body))]
+        number = len(rendered) + 1
+        part_path = part_file_path(file_path, number)
+        rendered.append(emit(part_path, (part_header(number, following is None), body)))
+        noun = "message" if message_count == 1 else "messages"
+        contents.append(f"- {_part_link(part_path, f'Part {number}')} ({message_count} {noun})\n")
+        if following is not None:
+            body, message_count = following
+
+    index = f"{header}This conversation is split into {len(rendered)} parts:\n\n{''.join(contents)}"
+    rendered.append(emit(file_path, (index,)))
+    return rendered
+
+def render_conversation(entry, output_base, config, input_base, context):
+    """
+    Render one conversation to a single markdown file (no splitting).
+    Returns: (file_path, markdown_text), or None if the entry is not a conversation
+    """
+    rendered = render_conversation_parts(entry, output_base, config, input_base, context, split=False)
+    return rendered[-1] if rendered else None
 
-                content, attachments = _get_message_content(
-                    message,
-                    input_base,
-                    output_base,
-                    config,
-                    file_path
-                )
-                author_name = _get_author_name(message, config)
+def _iter_message_events(entry, branch_mode='active'):
+    """
+    Yield the messages of a conversation in reading order.
 
-                if not config.get('skip_empty_messages', True) or content.strip():
-                    # Write author and content
-                    f.write(f"**{author_name}**:\n\n{content}{config['message_separator']}")
+    Events are ('message', depth, message), plus ('open', depth) and
+    ('close', depth) around alternate branches when branch_mode
+    is 'all'. The default 'active' mode walks parent links from
+    current_node back to the root, so only the branch shown in ChatGPT is
+    exported. Exports without a usable current_node fall back to sorting
+    every message by create_time.
 
-def main():
-    config_path = Path("config.json")
+    entry is a compact conversation (see message_model.compact_conversation):
+    its mapping holds Node records and messages are Message records.
+    """
+    mapping = entry.get("mapping") or {}
+
+    # Walk parent links from the current node back to the root (linear time)
+    active_path = []
+    node_id = entry.get("current_node")
+    while node_id in mapping and len(active_path) < len(mapping):
+        active_path.append(node_id)
+        node_id = mapping[node_id].parent
+
+    if not active_path:
+        yield from _iter_sorted_messages(mapping)
+        return
+
+    if branch_mode != 'all':
+        for node_id in reversed(active_path):
+            message = mapping[node_id].message
+            if message is not None:
+                yield ('message', 0, message)
+        return
+
+    # Depth-first over the whole tree. At each fork the active child stays in
+    # the main flow and the other children become nested alternate branches.
+    active_ids = set(active_path)
+    visited = set()
+    stack = [('node', active_path[-1], 0)]
+    while stack:
+        item = stack.pop()
+        if item[0] != 'node':
+            yield item
+            continue
 
+        _, node_id, depth = item
+        node = mapping.get(node_id)
+        if node is None or node_id in visited:
+            continue
+        visited.add(node_id)
+
+        message = node.message
+        if message is not None:
+            yield ('message', depth, message)
+
+        children = [child for child in node.children if child in mapping]
+        if not children:
+            continue
+        main_child = next((child for child in children if child in active_ids), children[-1])
+
+        # Pushed in reverse so alternates come out first, in export order,
+        # followed by the main continuation
+        stack.append(('node', main_child, depth))
+        for child in reversed(children):
+            if child != main_child:
+                stack.append(('close', depth + 1))
+                stack.append(('node', child, depth + 1))
+                stack.append(('open', depth + 1))
+
+def _iter_sorted_messages(mapping):
+    """Legacy ordering: every message in the mapping sorted by create_time."""
+    messages = [node.message for node in mapping.values() if node.message is not None]
+
+    # Sort messages by their create_time, handling None values
+    messages.sort(key=lambda x: x.create_time or float('-inf'))
+    for message in messages:
+        yield ('message', 0, message)
+
+def _branch_prefix(depth, use_callouts):
+    """Line prefix for content nested depth levels deep in alternate-branch callouts."""
+    return "> " * depth if use_callouts else ""
+
+def _prefix_lines(text, prefix):
+    if not prefix:
+        return text
+    lines = text.split("\n")
+    prefixed = [prefix + line if line else prefix.rstrip() for line in lines[:-1]]
+    return "\n".join(prefixed + [lines[-1]])
+
+def _open_branch(depth, use_callouts):
+    """Start of a collapsible alternate branch (edited or regenerated messages)."""
+    if use_callouts:
+        prefix = _branch_prefix(depth - 1, use_callouts)
+        return f"{prefix}> [!quote]- Alternate branch\n{prefix}>\n"
+    return "<details>\n<summary>Alternate branch</summary>\n\n"
+
+def _close_branch(depth, use_callouts):
+    if use_callouts:
+        return _branch_prefix(depth - 1, use_callouts).rstrip() + "\n"
+    return "</details>\n\n"
+
+def _write_output(writer, asset_store, asset_copies, write, files, journal, journal_entry):
+    """
+    Writer-thread task for one conversation: place its assets, write its
+    markdown files (one, or its parts and their index note) unless they
+    were streamed while rendering, then checkpoint it in the journal once
+    all of them are on disk.
+    """
+    if asset_copies:
+        start = time.perf_counter()
+        for src_path, target_path in asset_copies:
+            asset_store.place(src_path, target_path)
+        writer.add_time('asset_copy', time.perf_counter() - start)
+    for file_path, markdown in files or ():
+        if markdown is None:
+            # Already streamed to disk while it rendered
+            continue
+        start = time.perf_counter()
+        status, written = write(file_path, markdown)
+        writer.add_time('file_write', time.perf_counter() - start)
+        writer.count(f'files_{status}')
+        writer.count('markdown_bytes_written', written)
+    if journal is not None and journal_entry is not None:
+        journal.record(*journal_entry)
+
+def _category_name(entry, config):
+    """Organization category of a conversation (regular ones get the regular folder name)."""
+    return get_conversation_category(entry, config) or config.get('regular_folder', 'Regular')
+
+# State for process-pool workers, set once per worker by _init_worker
+_worker_state = {}
+
+def _init_worker(output_base, config, input_base, attachment_index, collect_search_rows=False, write=None):
+    forget_open_zips()
+    _worker_state.update(
+        output_base=output_base,
+        config=config,
+        plan=compile_render_plan(config),
+        input_base=input_base,
+        attachment_index=attachment_index,
+        collect_search_rows=collect_search_rows,
+        write=write,
+    )
+
+def _render_entry(entry, file_path=None):
+    """
+    Render one conversation (to file_path, if given) using the state set up by _init_worker.
+    Asset copies are returned rather than performed, so the parent process
+    applies them in order and no two workers ever copy the same target.
+    """
+    context = _new_render_context(
+        _worker_state['attachment_index'],
+        defer_asset_copies=True,
+        plan=_worker_state['plan'],
+        collect_search_rows=_worker_state['collect_search_rows']
+    )
+    start = time.perf_counter()
+    rendered = render_conversation_parts(
+        entry,
+        _worker_state['output_base'],
+        _worker_state['config'],
+        _worker_state['input_base'],
+        context,
+        write=_worker_state['write'],
+        file_path=file_path
+    )
+    seconds = time.perf_counter() - start
+    context['metrics'].add_time('render_conversation', seconds)
+    is_dict = isinstance(entry, dict)
+    return {
+        'id': entry.get('id') if is_dict else None,
+        'title': entry.get('title') if is_dict else None,
+        'update_time': entry.get('update_time') if is_dict else None,
+        'category': _category_name(entry, _worker_state['config']) if is_dict else None,
+        'rendered': rendered,
+        'asset_copies': context['asset_copies'],
+        'search_rows': context['search_rows'],
+        'stats': context['stats'],
+        'metrics': context['metrics'].to_dict(),
+        'seconds': seconds,
+    }
+
+def _render_serial(entries, output_base, config, input_base, attachment_index, collect_search_rows=False, write=None):
+    """
+    Render conversations in this process. With write, markdown is
+    streamed to disk while it renders (see render_conversation_parts).
+    """
+    _init_worker(output_base, config, input_base, attachment_index, collect_search_rows, write)
+    for entry, file_path in entries:
+        yield _render_entry(entry, file_path)
+
+def _render_parallel(entries, workers, output_base, config, input_base, attachment_index, collect_search_rows=False,
+                     budget=None):
+    """
+    Render conversations on a process pool, yielding results in input order.
+    At most a few conversations per worker are in flight, so a streamed
+    export is never read far ahead of the writer; with a MemoryBudget, at
+    most budget.window.
+    """
+    max_pending = workers * 4
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(output_base, config, input_base, attachment_index, collect_search_rows)
+    ) as pool:
+        pending = deque()
+        for entry, file_path in entries:
+            pending.append(pool.submit(_render_entry, entry, file_path))
+            while len(pending) >= (budget.window if budget is not None else max_pending):
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def _select_entries(data, selection, stats, seen_ids):
+    """
+    Yield only the conversations matched by the selection filters.
+    Sources that can check top-level fields before decoding the messages
+    (the export cache) are asked to do so. Rejected conversations still
+    count as seen, so remove_deleted_conversations keeps their files.
+    """
+    def predicate(entry):
+        if selection.matches(entry):
+            return True
+        stats['not_selected'] += 1
+        if isinstance(entry, dict) and entry.get('id'):
+            seen_ids.add(entry['id'])
+        return False
+
+    if hasattr(data, 'iter_selected'):
+        return data.iter_selected(predicate)
+    return (entry for entry in data if predicate(entry))
+
+def _claim_output_paths(entries, claims, config, output_base):
+    """Pair each conversation with the markdown path it writes to (see OutputPathClaims)."""
+    for entry in entries:
+        if not isinstance(entry, dict):
+            yield entry, None
+            continue
+        file_path, _ = conversation_file_path(entry, config, output_base)
+        yield entry, claims.claim(entry.get('id'), file_path)
+
+def _skip_unchanged(entries, manifest, fingerprint, output_base, stats, seen_ids, search_index=None):
+    """
+    Drop (entry, file_path) pairs whose manifest record shows the output is
+    current (and, with a search index, whose indexed rows are current too).
+    Every conversation id is added to seen_ids, skipped or not.
+    """
+    shared_paths = shared_output_paths(manifest)
+    for entry, file_path in entries:
+        conversation_id = entry.get('id') if isinstance(entry, dict) else None
+        if conversation_id:
+            seen_ids.add(conversation_id)
+            record = manifest.get(conversation_id)
+            if record is not None and record.get('path') not in shared_paths:
+                rel_path = relative_output_path(file_path, output_base)
+                if is_up_to_date(record, entry.get('update_time'), fingerprint, rel_path, output_base) and (
+                    search_index is None or search_index.is_current(conversation_id, entry.get('update_time'), fingerprint)
+                ):
+                    stats['unchanged'] += 1
+                    continue
+        yield entry, file_path
+
+def _iter_top_level_fields(data):
+    """
+    The conversations' top-level fields, when data can give them without
+    decoding any messages (an in-memory list or the export cache), else None.
+    """
+    if isinstance(data, list):
+        return data
+    if hasattr(data, 'iter_fields'):
+        return data.iter_fields()
+    return None
+
+def _compact_entries(entries, metrics):
+    """
+    Turn each conversation into the compact message model (message_model.py)
+    as it comes off the stream, so only the fields the renderer reads are
+    queued for, or pickled to, the render workers.
+    """
+    for entry, file_path in entries:
+        start = time.perf_counter()
+        entry = compact_conversation(entry)
+        metrics.add_time('compact_messages', time.perf_counter() - start)
+        yield entry, file_path
+
+def _remove_output(output_base, rel_path, claimed_paths, written_paths):
+    """Delete a previously written conversation file unless another conversation now owns it."""
+    if rel_path in written_paths or claimed_paths[rel_path] > 0:
+        return
+    old_path = Path(output_base) / rel_path
+    if old_path.exists():
+        old_path.unlink()
+
+def process_conversations(data, output_dir, config, input_base_path, workers=None, full=False, resume=False):
+    """
+    Process all conversations and generate markdown files.
+    data may be a list of conversation dicts, a ConversationStream or
+    MergedExports (then input_base_path is the list of export paths).
+    workers (or config['workers']) > 1 renders on a process pool; output is
+    still written in input order, identical to a serial run. full=True
+    re-renders conversations the incremental manifest calls unchanged, and
+    resume=True skips those an interrupted run's journal finished.
+    The config options are described in the README.
+    """
+    run_start = time.perf_counter()
+    output_base = Path(output_dir)
+    # The journal, manifest and run report live here even before any conversation is written
+    output_base.mkdir(parents=True, exist_ok=True)
+    if isinstance(input_base_path, (list, tuple)):
+        input_bases = [Path(path) for path in input_base_path]
+    else:
+        input_bases = [Path(input_base_path)]
+    input_base = input_bases[0]
+    workers = int(workers or config.get('workers', 1) or 1)
+    archive = ArchiveOutput(config['output_archive'], output_base) if config.get('output_archive') else None
+    incremental = config.get('incremental', True) and archive is None
+    metrics = RunMetrics()
+
+    # Scan the export once so every asset pointer is a dictionary lookup
+    with metrics.timed('attachment_index'):
+        attachment_index = build_merged_attachment_index(input_bases) if config.get('extract_assets', True) else {}
+    stats = {
+        'unresolved_attachments': 0, 'rendered': 0, 'unchanged': 0, 'removed': 0, 'not_selected': 0,
+        'split_conversations': 0,
+    }
+    directories = OutputDirectories()
+    asset_store = archive if archive is not None else AssetStore(
+        output_base, config.get('asset_mode', 'copy'), directories
+    )
+    selection = compile_selection(config)
+
+    # Create every conversation folder up front when that needs no JSON
+    # parsing; folders it misses are still created once, on first write
+    planned = _iter_top_level_fields(data) if archive is None else None
+    if planned is not None:
+        with metrics.timed('plan_directories'):
+            directories.create_all(plan_output_directories(planned, config, output_base, selection))
+
+    # Conversations finished by interrupted runs (read before a fresh run's journal replaces it)
+    finished = {}
+    if archive is None:
+        if resume:
+            finished = load_journal(output_base)
+            print(f"⏯️  Resuming: {len(finished)} conversation(s) already converted")
+        elif (output_base / JOURNAL_NAME).exists():
+            print("⚠️  A previous run was interrupted; starting over (use --resume to continue it instead)")
+
+    previous_manifest = load_manifest(output_base) if incremental else {}
+    manifest = dict(previous_manifest)
+    manifest.update(finished)
+    # Kept in step with manifest, for _remove_output
+    claimed_paths = count_record_paths(manifest)
+    fingerprint = config_fingerprint(config)
+    seen_ids = set()
+    search_index = open_search_index(output_base) if config.get('search_index', False) else None
+    journal = Journal(output_base, resume=resume) if archive is None else None
+
+    # Selection filters run first, so skipped conversations are never rendered
+    entries = _select_entries(data, selection, stats, seen_ids) if selection is not None else data
+    entries = _iter_with_progress(metrics.timed_iter(entries, 'json_load'), "Processing conversations", data)
+    entries = _claim_output_paths(entries, OutputPathClaims(output_base, manifest), config, output_base)
+    if (incremental and not full) or finished:
+        skip_records = dict(previous_manifest) if incremental and not full else {}
+        skip_records.update(finished)
+        entries = _skip_unchanged(
+            entries, skip_records, fingerprint, output_base, stats, seen_ids, search_index
+        )
+
+    entries = _compact_entries(entries, metrics)
+
+    budget = None
+    if config.get('max_memory_mb'):
+        budget = MemoryBudget(config['max_memory_mb'], workers * 4 if workers > 1 else 32)
+
+    # Archives are written strictly in order, so they get a single writer thread
+    writer = WriteBehind(
+        1 if archive is not None else int(config.get('writer_threads', 4) or 1),
+        int(config.get('write_queue_size', 64) or 1)
+    )
+    written_paths = set()
+
+    def write_markdown(file_path, markdown):
+        directories.ensure(file_path.parent)
+        return write_text_if_changed(file_path, markdown, make_parents=False)
+
+    def stream_markdown(file_path, pieces):
+        # Runs on this thread while the conversation renders; its time counts as rendering
+        directories.ensure(file_path.parent)
+        status, written = write_pieces_if_changed(file_path, pieces, make_parents=False)
+        writer.count(f'files_{status}')
+        writer.count('markdown_bytes_written', written)
+
+    collect_search_rows = search_index is not None
+    if workers > 1:
+        results = _render_parallel(
+            entries, workers, output_base, config, input_base, attachment_index, collect_search_rows, budget
+        )
+    else:
+        # Markdown for the output folder is written as it renders; archives take whole files
+        results = _render_serial(
+            entries, output_base, config, input_base, attachment_index, collect_search_rows,
+            stream_markdown if archive is None else None
+        )
+
+    try:
+        for result in results:
+            if budget is not None:
+                budget.finished(writer.drain)
+            metrics.merge(result['metrics'])
+            metrics.record_conversation(result['seconds'], result['id'], result['title'])
+            stats['unresolved_attachments'] += result['stats']['unresolved_attachments']
+            asset_copies = result['asset_copies']
+
+            if not result['rendered']:
+                if asset_copies:
+                    writer.submit(_write_output, writer, asset_store, asset_copies, None, None, None, None)
+                continue
+            files = result['rendered']
+            file_path = files[-1][0]
+            rel_path = relative_output_path(file_path, output_base)
+            part_paths = [relative_output_path(part_path, output_base) for part_path, _ in files[:-1]]
+            record = make_record(result['update_time'], fingerprint, rel_path, part_paths)
+            journal_entry = None
+            if result['id']:
+                asset_paths = [relative_output_path(target, output_base) for _, target in asset_copies]
+                journal_entry = (result['id'], record, asset_paths)
+            write = archive.write_text if archive is not None else write_markdown
+            writer.submit(
+                _write_output, writer, asset_store, asset_copies, write, files, journal, journal_entry,
+                key=file_path
+            )
+            stats['rendered'] += 1
+            if part_paths:
+                stats['split_conversations'] += 1
+
+            written_paths.add(rel_path)
+            written_paths.update(part_paths)
+            if result['id']:
+                seen_ids.add(result['id'])
+                if result['id'] in manifest:
+                    claimed_paths.subtract(record_paths(manifest[result['id']]))
+                manifest[result['id']] = record
+                claimed_paths.update(record_paths(record))
+                # Conversation moved (title or organization changed) or has fewer
+                # parts than before: drop the files it no longer writes
+                old_record = previous_manifest.get(result['id'])
+                if old_record:
+                    for old_path in record_paths(old_record):
+                        if old_path != rel_path and old_path not in part_paths:
+                            _remove_output(output_base, old_path, claimed_paths, written_paths)
+
+                if search_index is not None:
+                    with metrics.timed('search_index'):
+                        search_index.replace_conversation(
+                            result['id'], result['update_time'], fingerprint, _normalize_title(result['title']),
+                            result['category'], rel_path, result['search_rows']
+                        )
+        with metrics.timed('write_wait'):
+            writer.close()
+    except BaseException:
+        writer.abort()
+        if journal is not None:
+            journal.close(completed=False)
+        if archive is not None:
+            archive.abort()
+        raise
+    metrics.merge(writer.metrics.to_dict())
+    for status in ('new', 'updated', 'unchanged'):
+        stats[f'files_{status}'] = writer.metrics.counters.get(f'files_{status}', 0)
+    if archive is not None:
+        with metrics.timed('file_write'):
+            archive.close()
+        print(f"📦 Archive written: {archive.path}")
+
+    if incremental:
+        if config.get('remove_deleted_conversations', False):
+            for conversation_id in [cid for cid in manifest if cid not in seen_ids]:
+                old_paths = record_paths(manifest.pop(conversation_id))
+                claimed_paths.subtract(old_paths)
+                for old_path in old_paths:
+                    _remove_output(output_base, old_path, claimed_paths, written_paths)
+                if search_index is not None:
+                    search_index.remove_conversation(conversation_id)
+                stats['removed'] += 1
+        if manifest != previous_manifest:
+            save_manifest(output_base, manifest)
+
+    if journal is not None:
+        journal.close(completed=True)
+
+    if search_index is not None:
+        with metrics.timed('search_index'):
+            search_index.close()
+        print(f"🔍 Search index: {search_index.path}")
+
+    stats.update(asset_store.stats)
+    if budget is not None:
+        stats.update(budget.stats)
+    metrics.count('json_bytes_read', getattr(data, 'bytes_read', 0))
+    metrics.count('asset_bytes_written', asset_store.stats['asset_bytes_copied'])
+    if config.get('run_report', True):
+        report_path = write_run_report(output_base, metrics, stats, config, time.perf_counter() - run_start)
+        print(f"📊 Run report: {report_path}")
+
+    if stats['asset_bytes_saved']:
+        print(f"💾 Asset deduplication/linking saved {_format_bytes(stats['asset_bytes_saved'])} "
+              f"({stats['assets_linked']} linked, {stats['assets_copied']} copied)")
+    if stats['not_selected']:
+        print(f"🔎 Selected {stats['rendered'] + stats['unchanged']} conversation(s), "
+              f"skipped {stats['not_selected']} not matching the selection filters")
+    if stats['unchanged']:
+        print(f"♻️  Skipped {stats['unchanged']} unchanged conversation(s), rendered {stats['rendered']}")
+    if stats['rendered']:
+        print(f"📝 Files: {stats['files_new']} new, {stats['files_updated']} updated, "
+              f"{stats['files_unchanged']} unchanged (left untouched)")
+    if budget is not None and budget.stats['memory_checks']:
+        print(f"🧠 Peak memory {budget.stats['peak_memory_mb']:.0f} MB of max_memory_mb {budget.limit_mb:.0f} MB "
+              f"({budget.stats['memory_throttles']} batch(es) throttled)")
+    if stats['removed']:
+        print(f"🗑️  Removed {stats['removed']} conversation(s) no longer in the export")
+    if stats['unresolved_attachments']:
+        print(f"⚠️  {stats['unresolved_attachments']} attachment pointer(s) could not be resolved to files in {', '.join(map(str, input_bases))}")
+
+    return stats
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a ChatGPT export to markdown files.")
+    parser.add_argument(
+        "--config", default="config.json",
+        help="Config file to use (default: config.json in the current folder)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="Render conversations on N worker processes (overrides config 'workers')"
+    )
+    parser.add_argument(
+        "--full", action="store_true",
+        help="Re-render every conversation, ignoring what the incremental manifest says is unchanged"
+    )
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="Run under cProfile and save the stats next to the output (run-profile.prof)"
+    )
+    parser.add_argument(
+        "--id", dest="ids", action="append", metavar="ID",
+        help="Only convert the conversation with this id (repeatable; overrides config 'select_ids')"
+    )
+    parser.add_argument(
+        "--since", metavar="DATE",
+        help="Only convert conversations updated on or after DATE, e.g. 2025-01-31 (overrides config 'updated_after')"
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="Continue an interrupted run, skipping conversations it already finished"
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.profile:
+        return run(args)
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(run, args)
+    finally:
+        config = read_json_file(args.config) if Path(args.config).exists() else {}
+        profile_path = Path(config.get('output_directory', '.')) / "run-profile.prof"
+        profiler.dump_stats(profile_path)
+        print(f"\n🔬 Profile saved to: {profile_path} (worker processes are not included)")
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(20)
+
+def _export_cache_dir(config, output_dir, default=False):
+    """
+    Folder for the parsed-export cache: config 'export_cache' may be true
+    (the output folder) or a folder of its own. None when it is off
+    (default, when the config does not set it).
+    """
+    setting = config.get('export_cache', default)
+    if not setting:
+        return None
+    cache_dir = Path(output_dir) if setting is True else Path(setting)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+def _with_export_cache(data, output_dir, config):
+    """Read conversations from the parsed-export cache when it matches the export (config 'export_cache')."""
+    cache_dir = _export_cache_dir(config, output_dir)
+    if cache_dir is None:
+        return data
+    return open_export_cache(data, cache_dir)
+
+def open_export(input_path, input_mode=None, workers=1, whole_file_limit=None):
+    """
+    Open one export given as a ZIP, an extracted folder or a conversations JSON file.
+    input_mode ('zip', 'directory' or anything else for a single JSON file)
+    picks the kind; without it the kind is detected from the path.
+    workers > 1 decodes a sharded export's files in parallel, and
+    whole_file_limit caps the size of a file decoded in one piece.
+    Returns: (ConversationStream, base path for finding attachments)
+    """
+    input_path = Path(input_path)
+    if input_mode is None:
+        if is_zip_file(input_path):
+            input_mode = 'zip'
+        elif input_path.is_dir():
+            input_mode = 'directory'
+        elif input_path.is_file():
+            input_mode = 'file'
+        else:
+            raise FileNotFoundError(f"Export not found: {input_path}")
+
+    if input_mode == 'zip':
+        # Read straight from the export ZIP: conversations are streamed from
+        # the archive and only referenced attachments are copied out
+        stream = ConversationStream(list_zip_conversations(input_path), workers=workers,
+                                    whole_file_limit=whole_file_limit)
+        return stream, input_path
+    if input_mode == 'directory':
+        data = _load_conversation_data(input_path, workers, whole_file_limit)
+        if data is None:
+            raise FileNotFoundError(
+                f"No conversation files found in {input_path} (expected conversations.json or conversations-*.json)"
+            )
+        return data, input_path
+    # Single file mode - input_path is the conversations.json
+    return ConversationStream([input_path], whole_file_limit=whole_file_limit), input_path.parent
+
+def _open_merged_exports(input_paths, output_dir, config):
+    """
+    Merge several exports (config 'input_paths') into one deduplicated stream.
+    Each export gets its own export cache unless config 'export_cache' is
+    false: the dedup pass builds it, so the export JSON is decoded once
+    and later merges skip JSON parsing.
+    Returns: (MergedExports, list of attachment base paths)
+    """
+    bases = [open_export(input_path)[1] for input_path in input_paths]
+    cache_dir = _export_cache_dir(config, output_dir, default=True)
+
+    def opener(input_path):
+        def open_source():
+            stream, _ = open_export(input_path, workers=_workers(config), whole_file_limit=_whole_file_limit(config))
+            if cache_dir is None:
+                return stream
+            return open_export_cache(stream, cache_dir, export_cache_name(input_path), announce=False)
+        return open_source
+
+    print(f"🔗 Merging {len(input_paths)} exports...")
+    data = MergedExports([opener(input_path) for input_path in input_paths])
+    print(f"   {data.stats['conversations']} conversations, {len(data.winners)} unique "
+          f"({data.stats['duplicates']} older or duplicate copies dropped)")
+    return data, bases
+
+def _workers(config):
+    return int(config.get('workers', 1) or 1)
+
+def _whole_file_limit(config):
+    """With max_memory_mb, the largest export file to decode in one piece (None: the default)."""
+    if not config.get('max_memory_mb'):
+        return None
+    workers = _workers(config)
+    # The parallel loader holds up to two decoded shards per worker, plus the one being read
+    files_in_memory = 2 * workers + 1 if workers > 1 else 1
+    return min(json_backend.WHOLE_FILE_LIMIT, whole_file_limit(config['max_memory_mb'], files_in_memory))
+
+def load_config(config_path="config.json"):
+    """Read the converter config, or exit with a hint to run the setup wizard."""
+    config_path = Path(config_path)
     if not config_path.exists():
-        print("❌ config.json not found!")
+        print(f"❌ {config_path} not found!")
         print("🚀 Run setup wizard first: python setup.py")
         sys.exit(1)
+    return read_json_file(config_path)
 
-    config = read_json_file(config_path)
-
-    input_path = Path(config['input_path'])
+def convert_export(config, full=False, resume=False):
+    """
+    Convert the export named in config (input_path and input_mode, or
+    input_paths to merge several) into config['output_directory'].
+    Raises ValueError or FileNotFoundError when an export cannot be opened.
+    Returns: stats from process_conversations
+    """
     output_dir = Path(config['output_directory'])
 
     # Create output directory
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    # Determine the base path for finding attachments
-    if config['input_mode'] == 'directory':
-        input_base_path = input_path
-        data = _load_conversation_data(input_path)
-
-        if data is not None:
-            process_conversations(data, str(output_dir), config, str(input_base_path))
-        else:
-            print(f"❌ Error: no conversation files found in {input_path}")
-            print("   Expected conversations.json or conversations-*.json")
-            sys.exit(1)
+    if config.get('input_paths'):
+        # Several exports (folders or ZIPs), merged and deduplicated by conversation id
+        data, input_bases = _open_merged_exports(config['input_paths'], output_dir, config)
+        input_base_path = [str(base) for base in input_bases]
     else:
-        # Single file mode - assume input_path is the conversations.json
-        input_base_path = input_path.parent
-        data = read_json_file(input_path)
-        process_conversations(data, str(output_dir), config, str(input_base_path))
+        data, input_base_path = open_export(
+            config['input_path'], config.get('input_mode'), _workers(config), _whole_file_limit(config)
+        )
+        data = _with_export_cache(data, output_dir, config)
+        input_base_path = str(input_base_path)
+
+    return process_conversations(data, str(output_dir), config, input_base_path, full=full, resume=resume)
+
+def run(args):
+    config = load_config(args.config)
+    if args.workers is not None:
+        config['workers'] = args.workers
+    if args.ids:
+        config['select_ids'] = args.ids
+    if args.since:
+        config['updated_after'] = args.since
+
+    try:
+        convert_export(config, full=args.full, resume=args.resume)
+    except (ValueError, FileNotFoundError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+    _print_done(Path(config['output_directory']), config)
 
+def _print_done(output_dir, config):
     print(f"\n✅ All Done! You can access your files here: {output_dir}")
     if config.get('extract_assets', True):
         print(f"📁 Created markdown files with embedded images and audio.")
@@ -0,0 +1,234 @@
+import hashlib
+import json
+import marshal
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+from extract_zip import ZipMember
+
+EXPORT_CACHE_NAME = '.c2md-export-cache'
+
+MAGIC = b'C2MDEXP\x00'
+
+# Bump when the record layout changes or normalize_conversation keeps different fields
+CACHE_VERSION = 2
+
+RECORD_LENGTH = struct.Struct('<I')
+
+# Fields the converter reads; everything else in the export is dropped
+CONVERSATION_KEYS = (
+    'id', 'conversation_id', 'title', 'create_time', 'update_time',
+    'current_node', 'is_archived', 'is_starred', 'mapping',
+)
+MESSAGE_KEYS = ('id', 'author', 'create_time', 'content', 'recipient')
+AUTHOR_KEYS = ('role', 'name')
+MESSAGE_METADATA_KEYS = ('is_visually_hidden_from_conversation',)
+
+def _pick(data, keys):
+    return {key: data[key] for key in keys if key in data}
+
+def _normalize_message(message):
+    if not isinstance(message, dict):
+        return message
+    normalized = _pick(message, MESSAGE_KEYS)
+    if isinstance(message.get('author'), dict):
+        normalized['author'] = _pick(message['author'], AUTHOR_KEYS)
+    if isinstance(message.get('metadata'), dict):
+        normalized['metadata'] = _pick(message['metadata'], MESSAGE_METADATA_KEYS)
+    return normalized
+
+def normalize_conversation(entry):
+    """
+    Reduce a conversation to the fields the converter uses.
+    Message content is kept whole (parts, asset pointers, thoughts, ...),
+    while per-message metadata such as citations and model details is dropped.
+    """
+    if not isinstance(entry, dict):
+        return entry
+    normalized = _pick(entry, CONVERSATION_KEYS)
+    mapping = entry.get('mapping')
+    if isinstance(mapping, dict):
+        normalized['mapping'] = {
+            node_id: dict(node, message=_normalize_message(node.get('message')))
+            if isinstance(node, dict) else node
+            for node_id, node in mapping.items()
+        }
+    return normalized
+
+def source_key(files):
+    """
+    Identify the export files by path, size and modification time
+    (for ZIP members: the archive's size and mtime plus the member name).
+    """
+    key = []
+    for file in files:
+        if isinstance(file, ZipMember):
+            stat = os.stat(file.zip_path)
+            key.append([str(Path(file.zip_path).resolve()), file.name, stat.st_size, stat.st_mtime_ns])
+        else:
+            stat = os.stat(file)
+            key.append([str(Path(file).resolve()), stat.st_size, stat.st_mtime_ns])
+    return {
+        'version': CACHE_VERSION,
+        # marshal's format is only guaranteed within one Python version
+        'python': [sys.version_info[0], sys.version_info[1], marshal.version],
+        'sources': key,
+    }
+
+def _read_header(f):
+    if f.read(len(MAGIC)) != MAGIC:
+        return None, 0
+    (length,) = RECORD_LENGTH.unpack(f.read(RECORD_LENGTH.size))
+    header = json.loads(f.read(length).decode('utf-8'))
+    return header, len(MAGIC) + RECORD_LENGTH.size + length
+
+def _split_record(entry):
+    """A normalized conversation as (top-level fields, mapping) for the two halves of a record."""
+    if not isinstance(entry, dict) or 'mapping' not in entry:
+        return entry, None
+    fields = {key: value for key, value in entry.items() if key != 'mapping'}
+    return fields, entry['mapping']
+
+class CachedConversations:
+    """
+    Conversations read back from an export cache.
+
+    The file is MAGIC, a length-prefixed JSON header (the source key), then
+    one record per conversation: its top-level fields and its mapping as two
+    length-prefixed marshal blobs (an empty mapping blob means no mapping).
+    It is memory-mapped and decoded one record at a time; iter_selected()
+    only decodes the mapping of conversations whose fields pass a filter,
+    and iter_fields() never decodes one.
+    Like ConversationStream it exposes total_bytes and bytes_read for the
+    progress bar.
+    """
+
+    def __init__(self, path, data_start):
+        self.path = Path(path)
+        self.data_start = data_start
+        self.total_bytes = self.path.stat().st_size - data_start
+        self.bytes_read = 0
+
+    def __iter__(self):
+        return self.iter_selected(None)
+
+    def iter_selected(self, predicate):
+        """
+        Yield conversations; with a predicate, only those for which
+        predicate(top-level fields) is true, without decoding the others' messages.
+        """
+        for fields, view, mapping_start, mapping_length in self._records():
+            if predicate is not None and not predicate(fields):
+                continue
+            if mapping_length:
+                fields['mapping'] = _load_blob(view, mapping_start, mapping_length)
+            yield fields
+
+    def iter_fields(self):
+        """Yield only the top-level fields of every conversation (no messages are decoded)."""
+        for fields, _, _, _ in self._records():
+            yield fields
+
+    def _records(self):
+        """Yield (fields, view, mapping_start, mapping_length) for every record, in file order."""
+        self.bytes_read = 0
+        with open(self.path, 'rb') as f:
+            if self.total_bytes <= 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    offset = self.data_start
+                    end = len(mapped)
+                    while offset < end:
+                        (fields_length,) = RECORD_LENGTH.unpack_from(mapped, offset)
+                        offset += RECORD_LENGTH.size
+                        fields = _load_blob(view, offset, fields_length)
+                        offset += fields_length
+                        (mapping_length,) = RECORD_LENGTH.unpack_from(mapped, offset)
+                        offset += RECORD_LENGTH.size
+                        mapping_start = offset
+                        offset += mapping_length
+                        self.bytes_read = offset - self.data_start
+                        yield fields, view, mapping_start, mapping_length
+                finally:
+                    view.release()
+
+def _load_blob(view, offset, length):
+    blob = view[offset:offset + length]
+    try:
+        return marshal.loads(blob)
+    finally:
+        blob.release()
+
+class CachingStream:
+    """
+    Pass conversations through from a ConversationStream while writing them
+    to the export cache. The cache only replaces the previous one once the
+    whole export has been read, so an interrupted run never leaves a
+    truncated cache behind.
+    """
+
+    def __init__(self, stream, path, key):
+        self.stream = stream
+        self.path = Path(path)
+        self.key = key
+
+    @property
+    def total_bytes(self):
+        return self.stream.total_bytes
+
+    @property
+    def bytes_read(self):
+        return self.stream.bytes_read
+
+    def __iter__(self):
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        complete = False
+        try:
+            with open(tmp_path, 'wb') as f:
+                header = json.dumps(self.key).encode('utf-8')
+                f.write(MAGIC + RECORD_LENGTH.pack(len(header)) + header)
+                for entry in self.stream:
+                    fields, mapping = _split_record(normalize_conversation(entry))
+                    fields_blob = marshal.dumps(fields)
+                    mapping_blob = marshal.dumps(mapping) if mapping is not None else b''
+                    f.write(RECORD_LENGTH.pack(len(fields_blob)))
+                    f.write(fields_blob)
+                    f.write(RECORD_LENGTH.pack(len(mapping_blob)))
+                    f.write(mapping_blob)
+                    yield entry
+            os.replace(tmp_path, self.path)
+            complete = True
+        finally:
+            if not complete and tmp_path.exists():
+                tmp_path.unlink()
+
+def export_cache_name(export_path):
+    """Cache file name for one of several merged exports, stable for a given export path."""
+    digest = hashlib.sha1(str(Path(export_path).resolve()).encode('utf-8')).hexdigest()[:10]
+    return f"{EXPORT_CACHE_NAME}-{digest}"
+
+def open_export_cache(stream, output_base, name=EXPORT_CACHE_NAME, announce=True):
+    """
+    Wrap a ConversationStream with the export cache in output_base.
+
+    Returns:
+        CachedConversations when the cache matches the export files,
+        otherwise a CachingStream that (re)builds it while streaming
+    """
+    path = Path(output_base) / name
+    key = source_key(stream.files)
+    if path.exists():
+        try:
+            with open(path, 'rb') as f:
+                header, data_start = _read_header(f)
+        except (OSError, ValueError, struct.error):
+            header = None
+        if header == key:
+            if announce:
+                print("⚡ Reading conversations from the export cache")
+            return CachedConversations(path, data_start)
+    return CachingStream(stream, path, key)
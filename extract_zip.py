@@ -1,7 +1,15 @@
 import zipfile
 import os
 import shutil
-from pathlib import Path
+import fnmatch
+from collections import namedtuple
+from pathlib import Path, PurePosixPath
+
+# A file inside an export ZIP, used in place of a filesystem path
+ZipMember = namedtuple('ZipMember', ['zip_path', 'name'])
+
+# Open archives, so repeated member reads don't re-parse the central directory
+_open_zips = {}
 
 def _find_conversation_jsons(base_dir):
     """Find conversation JSON files in old and new ChatGPT export formats."""
@@ -17,6 +25,84 @@ def _find_conversation_jsons(base_dir):
     return legacy
 
 
+def _find_conversation_members(names):
+    """Same as _find_conversation_jsons, for member names inside a ZIP."""
+    shards = sorted(n for n in names if fnmatch.fnmatch(PurePosixPath(n).name, "conversations-*.json"))
+    if shards:
+        return shards
+
+    return [n for n in names if PurePosixPath(n).name == "conversations.json"]
+
+def _get_zip(zip_path):
+    zip_path = str(zip_path)
+    if zip_path not in _open_zips:
+        _open_zips[zip_path] = zipfile.ZipFile(zip_path, 'r')
+    return _open_zips[zip_path]
+
+def forget_open_zips():
+    """
+    Drop the archives opened so far, without closing them. Called first
+    thing in a worker process: after a fork the inherited handles share
+    their file offset with the parent (whose writer threads keep reading
+    assets through them), and ZipFile's lock does not span processes, so
+    a child has to open its own.
+    """
+    _open_zips.clear()
+
+def list_zip_conversations(zip_path):
+    """
+    Find conversation JSON files inside a ChatGPT export ZIP without extracting it.
+
+    Returns:
+        List of ZipMember for conversations-*.json shards or conversations.json
+    """
+    zip_path = Path(zip_path)
+    if not is_zip_file(zip_path):
+        raise ValueError(f"Not a valid ZIP file: {zip_path}")
+
+    members = _find_conversation_members(_get_zip(zip_path).namelist())
+    if not members:
+        raise FileNotFoundError(
+            "No conversation JSON files found in ZIP. "
+            "Expected conversations.json or conversations-*.json. "
+            "Make sure you exported the correct ChatGPT data."
+        )
+    return [ZipMember(str(zip_path), name) for name in members]
+
+def iter_zip_export_files(zip_path):
+    """
+    Walk the ZIP's central directory (no data is read).
+
+    Yields:
+        (relative_parts, ZipMember) for every file under the export root, where
+        relative_parts is the member path split on '/' relative to the folder
+        holding the conversation JSON files
+    """
+    conversations = list_zip_conversations(zip_path)
+    base = PurePosixPath(conversations[0].name).parent
+    base_parts = base.parts if str(base) != '.' else ()
+
+    for info in _get_zip(zip_path).infolist():
+        if info.is_dir():
+            continue
+        parts = PurePosixPath(info.filename).parts
+        if parts[:len(base_parts)] != base_parts:
+            continue
+        yield parts[len(base_parts):], ZipMember(str(zip_path), info.filename)
+
+def zip_member_size(member):
+    """Uncompressed size of a ZIP member in bytes."""
+    return _get_zip(member.zip_path).getinfo(member.name).file_size
+
+def open_zip_member(member):
+    """Open a ZIP member for binary reading."""
+    return _get_zip(member.zip_path).open(member.name, 'r')
+
+def copy_zip_member(member, target_path):
+    """Stream a single ZIP member to target_path."""
+    with open_zip_member(member) as src, open(target_path, 'wb') as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+
 def extract_chatgpt_zip(zip_path, extract_to=None):
     """
     Extract ChatGPT export ZIP file.
@@ -0,0 +1,95 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from manifest import record_paths
+
+JOURNAL_NAME = '.c2md-journal.jsonl'
+
+class Journal:
+    """
+    Append-only checkpoint journal for resuming an interrupted conversion.
+
+    One JSON line is appended per conversation once its markdown and
+    assets are on disk: the conversation id, its manifest record and the
+    assets it placed. Lines are buffered and written in batches, with an
+    fsync every flush_every records or flush_seconds, whichever comes
+    first, so a crash loses at most the last batch (which is simply
+    rendered again on resume). record() may be called from writer threads.
+
+    A fresh run starts an empty journal; a resumed run appends to the one
+    it resumes (dropping a torn last line first), so interrupting it again
+    keeps the earlier runs' checkpoints. A run that finishes removes the
+    journal, since the manifest then holds the same information.
+    """
+
+    def __init__(self, output_base, resume=False, flush_every=200, flush_seconds=2.0):
+        self.path = Path(output_base) / JOURNAL_NAME
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        if resume and self.path.exists():
+            _drop_torn_line(self.path)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        else:
+            self._file = open(self.path, 'w', encoding='utf-8')
+        self._pending = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, conversation_id, manifest_record, assets):
+        line = json.dumps({'id': conversation_id, 'record': manifest_record, 'assets': assets})
+        with self._lock:
+            self._pending.append(line + '\n')
+            if len(self._pending) >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_seconds:
+                self._flush()
+
+    def _flush(self):
+        if self._pending:
+            self._file.write(''.join(self._pending))
+            self._pending = []
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_flush = time.monotonic()
+
+    def close(self, completed):
+        """Flush and close; a completed run deletes the journal."""
+        with self._lock:
+            self._flush()
+            self._file.close()
+        if completed:
+            self.path.unlink()
+
+def _drop_torn_line(path):
+    """Cut the journal back to its last complete line, so appended lines stay readable."""
+    with open(path, 'rb+') as f:
+        data = f.read()
+        if data and not data.endswith(b'\n'):
+            f.truncate(data.rfind(b'\n') + 1)
+
+def load_journal(output_base):
+    """
+    Read the journal left by an interrupted run.
+
+    Returns:
+        dict of conversation id -> manifest record, for conversations whose
+        markdown file(s) and assets all still exist (a torn last line is ignored)
+    """
+    output_base = Path(output_base)
+    journal_path = output_base / JOURNAL_NAME
+    if not journal_path.exists():
+        return {}
+
+    finished = {}
+    with open(journal_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break
+            paths = record_paths(entry['record']) + entry.get('assets', [])
+            if all((output_base / path).exists() for path in paths):
+                finished[entry['id']] = entry['record']
+            else:
+                finished.pop(entry['id'], None)
+    return finished
@@ -0,0 +1,44 @@
+import json
+
+# Optional accelerated decoder (pip install orjson); the stdlib json module is used without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_BACKEND = 'orjson' if orjson is not None else 'json'
+
+# Largest export file decoded in one call rather than streamed one
+# conversation at a time (see json_stream.iter_json_array)
+WHOLE_FILE_LIMIT = 32 * 1024 * 1024  # 32 MiB
+
+def loads(data):
+    """
+    Decode a JSON document from raw bytes (or str) with the fastest
+    available backend.
+
+    orjson is stricter than the stdlib: it rejects NaN/Infinity and lone
+    surrogate escapes such as "\\ud83d", which do turn up in exports.
+    Documents it refuses are decoded again with the stdlib, so both
+    backends accept exactly the same input.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+def load_file(file_path):
+    """Read a JSON file as raw bytes and decode it with loads()."""
+    with open(file_path, 'rb') as f:
+        return loads(f.read())
+
+def decode_whole_file(size, limit=None):
+    """
+    Whether an export file of this many bytes should be decoded in one
+    call (limit defaults to WHOLE_FILE_LIMIT). Only with orjson: the
+    stdlib decoder is no faster on a whole document than when streaming
+    it, and streaming keeps memory bounded.
+    """
+    return orjson is not None and size <= (WHOLE_FILE_LIMIT if limit is None else limit)
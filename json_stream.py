@@ -0,0 +1,212 @@
+import codecs
+import json
+import marshal
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import json_backend
+from extract_zip import ZipMember, zip_member_size, open_zip_member, forget_open_zips
+
+JSON_WHITESPACE = ' \t\n\r'
+# What may follow an array element
+ELEMENT_END = JSON_WHITESPACE + ',]'
+DEFAULT_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+
+def iter_json_array(file_obj, chunk_size=DEFAULT_CHUNK_SIZE, on_bytes=None):
+    """
+    Yield the elements of a top-level JSON array one at a time.
+
+    Only one element (plus a read-ahead chunk) is held in memory, so a
+    multi-GB conversations.json can be processed with roughly constant memory.
+    A top-level object is yielded as a single element.
+
+    Args:
+        file_obj: Binary file object positioned at the start of the document
+        chunk_size: Number of bytes to read at a time
+        on_bytes: Optional callback receiving the number of bytes read per chunk
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    buf = ''
+    pos = 0
+    eof = False
+
+    def fill(min_chars):
+        # Read at least min_chars more characters (or until EOF)
+        nonlocal buf, pos, eof
+        pieces = [buf[pos:]]
+        added = 0
+        while not eof and added < min_chars:
+            raw = file_obj.read(chunk_size)
+            if on_bytes and raw:
+                on_bytes(len(raw))
+            if not raw:
+                eof = True
+                text = text_decoder.decode(b'', final=True)
+            else:
+                text = text_decoder.decode(raw)
+            pieces.append(text)
+            added += len(text)
+        buf = ''.join(pieces)
+        pos = 0
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in JSON_WHITESPACE:
+                pos += 1
+            if pos < len(buf) or eof:
+                return
+            fill(chunk_size)
+
+    skip_whitespace()
+    if pos >= len(buf):
+        return
+
+    if buf[pos] != '[':
+        # Not an array: decode the whole document as one value
+        fill(float('inf'))
+        value = json.loads(buf)
+        yield value
+        return
+
+    pos += 1
+    expect_value = True
+    while True:
+        skip_whitespace()
+        if pos >= len(buf):
+            raise ValueError("Unexpected end of JSON array")
+
+        if buf[pos] == ']':
+            return
+
+        if not expect_value:
+            if buf[pos] != ',':
+                raise ValueError(f"Expected ',' or ']' in JSON array, got {buf[pos]!r}")
+            pos += 1
+            skip_whitespace()
+
+        # Decode the next element, reading more input until it is complete:
+        # followed by a delimiter, since a number cut off at the end of the
+        # buffer (the "1.5" of "1.5e10") also decodes. Asking for at least
+        # the current buffer size each retry keeps the total re-scan cost
+        # linear for very large elements.
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+                if eof or (end < len(buf) and buf[end] in ELEMENT_END):
+                    break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            fill(max(chunk_size, len(buf) - pos))
+
+        pos = end
+        expect_value = False
+        yield value
+
+        # Drop consumed text so the buffer does not grow with the file
+        if pos > chunk_size:
+            buf = buf[pos:]
+            pos = 0
+
+def _read_file(file):
+    """Decode one whole export JSON file into a list of conversations with the JSON backend."""
+    with ConversationStream._open(file) as f:
+        value = json_backend.loads(f.read())
+    return value if isinstance(value, list) else [value]
+
+def _decode_file(file):
+    """
+    _read_file in a loader process. The list of conversations is handed
+    back marshalled, which is much cheaper to send between processes than
+    pickling the nested dicts.
+    """
+    return marshal.dumps(_read_file(file))
+
+class ConversationStream:
+    """
+    Lazily iterate conversations from one or more export JSON files.
+
+    Files are read in order, one conversation at a time. Each file is either
+    a filesystem path or a ZipMember, which is read straight from the export
+    ZIP. total_bytes is known up front (from file sizes) and bytes_read
+    advances as the files are consumed, which drives a bytes-based progress bar.
+
+    With orjson installed, files up to whole_file_limit bytes (default
+    json_backend.WHOLE_FILE_LIMIT; typical shards) are read as raw bytes and
+    decoded in one call; other files are streamed with the stdlib decoder
+    so memory stays bounded.
+
+    With workers > 1 and several files (the sharded conversations-NNN.json
+    layout) all within that limit, whole shards are decoded side by side
+    on a process pool and their conversations yielded in file order, so
+    the result is the same as reading them one after another. At most two
+    shards per worker are decoded ahead of the consumer. The pool is
+    capped at the number of CPUs.
+    """
+
+    def __init__(self, files, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, whole_file_limit=None):
+        self.files = [f if isinstance(f, ZipMember) else Path(f) for f in files]
+        self.chunk_size = chunk_size
+        # Decoding on more processes than cores only adds overhead
+        self.workers = max(1, min(int(workers or 1), os.cpu_count() or 1))
+        self.whole_file_limit = json_backend.WHOLE_FILE_LIMIT if whole_file_limit is None else whole_file_limit
+        self.sizes = [self._size(f) for f in self.files]
+        self.total_bytes = sum(self.sizes)
+        self.bytes_read = 0
+
+    @staticmethod
+    def _size(file):
+        if isinstance(file, ZipMember):
+            return zip_member_size(file)
+        return file.stat().st_size
+
+    @staticmethod
+    def _open(file):
+        if isinstance(file, ZipMember):
+            return open_zip_member(file)
+        return open(file, 'rb')
+
+    def _count_bytes(self, count):
+        self.bytes_read += count
+
+    def __iter__(self):
+        self.bytes_read = 0
+        if self.workers > 1 and len(self.files) > 1 and max(self.sizes) <= self.whole_file_limit:
+            yield from self._iter_parallel()
+            return
+        for file_path, size in zip(self.files, self.sizes):
+            if json_backend.decode_whole_file(size, self.whole_file_limit):
+                conversations = _read_file(file_path)
+                self.bytes_read += size
+                yield from conversations
+                continue
+            with self._open(file_path) as f:
+                yield from iter_json_array(f, self.chunk_size, self._count_bytes)
+
+    def _iter_parallel(self):
+        pool = ProcessPoolExecutor(max_workers=min(self.workers, len(self.files)), initializer=forget_open_zips)
+        files = iter(zip(self.files, self.sizes))
+        pending = deque()
+
+        def submit_next():
+            file_path, size = next(files, (None, 0))
+            if file_path is not None:
+                pending.append((size, pool.submit(_decode_file, file_path)))
+
+        try:
+            for _ in range(self.workers * 2):
+                submit_next()
+            while pending:
+                size, future = pending.popleft()
+                conversations = marshal.loads(future.result())
+                submit_next()
+                self.bytes_read += size
+                yield from conversations
+        finally:
+            # Stopped early (or failed): don't decode shards nobody will read
+            for _, future in pending:
+                future.cancel()
+            pool.shutdown(wait=True)
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+from collections import Counter
+from pathlib import Path
+from selection import SELECTION_KEYS
+
+MANIFEST_NAME = '.c2md-manifest.json'
+
+# Bump when the markdown output format changes so old manifests re-render everything
+MANIFEST_VERSION = 1
+
+# Config keys that do not change the rendered markdown
+RUNTIME_ONLY_KEYS = {
+    'input_path',
+    'input_paths',
+    'input_mode',
+    'output_directory',
+    'workers',
+    'incremental',
+    'remove_deleted_conversations',
+    'asset_mode',
+    'run_report',
+    'search_index',
+    'export_cache',
+    'output_archive',
+    'writer_threads',
+    'write_queue_size',
+    'max_memory_mb',
+} | set(SELECTION_KEYS)
+
+def config_fingerprint(config):
+    """
+    Hash the config options that affect rendered output.
+    Conversations rendered with a different fingerprint are re-rendered.
+    """
+    relevant = {k: v for k, v in config.items() if k not in RUNTIME_ONLY_KEYS}
+    payload = json.dumps([MANIFEST_VERSION, relevant], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+def load_manifest(output_base):
+    """
+    Load the conversation manifest from the output directory.
+
+    Returns:
+        dict of conversation id -> {'update_time', 'fingerprint', 'path'}
+        (plus 'parts' for conversations split into part files)
+        (empty if there is no manifest or it is unreadable)
+    """
+    manifest_path = Path(output_base) / MANIFEST_NAME
+    if not manifest_path.exists():
+        return {}
+
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        print(f"⚠️  Ignoring unreadable manifest: {manifest_path}")
+        return {}
+
+    if not isinstance(data, dict) or data.get('version') != MANIFEST_VERSION:
+        return {}
+    return data.get('conversations', {})
+
+def save_manifest(output_base, conversations):
+    """Write the manifest atomically (temp file + rename)."""
+    manifest_path = Path(output_base) / MANIFEST_NAME
+    tmp_path = manifest_path.with_name(manifest_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': MANIFEST_VERSION, 'conversations': conversations}, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+def shared_output_paths(conversations):
+    """
+    Paths claimed by more than one conversation. OutputPathClaims keeps
+    new runs from sharing paths, but manifests written before it existed
+    can; those conversations are re-rendered (and given their own paths).
+    """
+    counts = Counter(record.get('path') for record in conversations.values())
+    return {path for path, count in counts.items() if count > 1}
+
+class OutputPathClaims:
+    """
+    Gives every conversation a markdown path of its own. Conversations
+    whose titles (and folders) collide would otherwise overwrite each
+    other's file, so the first to claim a path keeps it and the others get
+    the start of their id appended, e.g. "New chat (1a2b3c4d).md".
+    Claims recorded in the manifest are honoured first, so a conversation
+    keeps its file name from run to run whatever the export order.
+    """
+
+    def __init__(self, output_base, manifest=None):
+        self.output_base = Path(output_base)
+        manifest = manifest or {}
+        # A path several records share (older manifests) goes to whoever claims it first, as in a fresh run
+        shared = shared_output_paths(manifest)
+        self.owners = {
+            record.get('path'): conversation_id
+            for conversation_id, record in manifest.items()
+            if record.get('path') not in shared
+        }
+
+    def claim(self, conversation_id, file_path):
+        """The path conversation_id writes to: file_path, or its unique variant when another conversation holds it."""
+        if not conversation_id:
+            return file_path
+        file_path = Path(file_path)
+        unique_path = file_path.with_name(f"{file_path.stem} ({str(conversation_id)[:8]}){file_path.suffix}")
+        rel_path = relative_output_path(file_path, self.output_base)
+        unique_rel_path = relative_output_path(unique_path, self.output_base)
+        owner = self.owners.get(rel_path)
+        if owner == conversation_id or (owner is None and self.owners.get(unique_rel_path) != conversation_id):
+            self.owners[rel_path] = conversation_id
+            return file_path
+        self.owners[unique_rel_path] = conversation_id
+        return unique_path
+
+def is_up_to_date(record, update_time, fingerprint, rel_path, output_base):
+    """Check whether a conversation's previous output can be kept as-is."""
+    return (
+        record is not None
+        and record.get('update_time') == update_time
+        and record.get('fingerprint') == fingerprint
+        and record.get('path') == rel_path
+        and all((Path(output_base) / path).exists() for path in record_paths(record))
+    )
+
+def make_record(update_time, fingerprint, rel_path, parts=None):
+    """A manifest record; parts lists the part files of a split conversation (see render_conversation_parts)."""
+    record = {'update_time': update_time, 'fingerprint': fingerprint, 'path': rel_path}
+    if parts:
+        record['parts'] = list(parts)
+    return record
+
+def record_paths(record):
+    """Every file a manifest record's conversation was written to: its path, then any parts."""
+    return [record.get('path')] + list(record.get('parts', ()))
+
+def count_record_paths(conversations):
+    """How many manifest records list each file, so "is this file still claimed?" is a lookup rather than a scan."""
+    return Counter(path for record in conversations.values() for path in record_paths(record))
+
+def relative_output_path(file_path, output_base):
+    """Manifest paths are stored relative to the output directory with forward slashes."""
+    return Path(file_path).relative_to(output_base).as_posix()
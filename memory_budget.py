@@ -0,0 +1,127 @@
+import gc
+import os
+from pathlib import Path
+
+MIB = 1024 * 1024
+
+# Decoded conversations take roughly this many times their JSON size in memory
+DECODED_SIZE_FACTOR = 10
+
+def _memory_bytes(pid):
+    """
+    Proportional set size of a process: pages shared with the parent after
+    fork are split between them instead of counted in full in each, which
+    matches what a container's memory limit charges. Falls back to RSS on
+    kernels without smaps_rollup.
+    """
+    try:
+        with open(f'/proc/{pid}/smaps_rollup', 'r') as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    with open(f'/proc/{pid}/statm', 'r') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+def _child_pids(pid):
+    children = []
+    for children_file in Path(f'/proc/{pid}/task').glob('*/children'):
+        try:
+            children.extend(int(child) for child in children_file.read_text().split())
+        except OSError:
+            pass
+    return children
+
+def process_tree_memory_mb():
+    """
+    Memory of this process plus its worker processes, in MB.
+    Read from /proc on Linux (PSS), else from psutil if it is installed
+    (RSS); None when neither is available.
+    """
+    if Path('/proc/self/statm').exists():
+        total = 0
+        pids = [os.getpid()]
+        while pids:
+            pid = pids.pop()
+            try:
+                total += _memory_bytes(pid)
+            except (OSError, ValueError):
+                continue
+            pids.extend(_child_pids(pid))
+        return total / MIB
+
+    try:
+        import psutil
+    except ImportError:
+        return None
+    process = psutil.Process()
+    total = process.memory_info().rss
+    for child in process.children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:
+            pass
+    return total / MIB
+
+def whole_file_limit(max_memory_mb, files_in_memory=1):
+    """Largest export file that may be decoded in one piece when files_in_memory of them can be held at once."""
+    return int(max_memory_mb * MIB) // (DECODED_SIZE_FACTOR * max(1, files_in_memory) * 2)
+
+class MemoryBudget:
+    """
+    Keeps a conversion under max_memory_mb of resident memory (this
+    process and its worker processes together).
+
+    Conversations pass through the pipeline in batches of `window`, which
+    is also how many may be in flight between reading and writing. After
+    each batch the memory in use is measured. Above HIGH_WATER of the
+    limit, the batch is released (queued writes are drained, garbage is
+    collected) and the window is halved; below LOW_WATER it doubles again,
+    up to max_window. Once the window is down to 1, garbage is only
+    collected when the limit itself is crossed. Where memory cannot be
+    measured the window stays at max_window, which still bounds the work
+    in flight.
+    """
+
+    HIGH_WATER = 0.8
+    LOW_WATER = 0.5
+
+    def __init__(self, max_memory_mb, max_window):
+        self.limit_mb = float(max_memory_mb)
+        self.max_window = max(1, int(max_window))
+        self.window = self.max_window
+        self.stats = {'memory_checks': 0, 'memory_throttles': 0, 'peak_memory_mb': 0.0}
+        self._in_batch = 0
+        self._warned = False
+
+    def finished(self, release):
+        """
+        Count one conversation as done. At the end of a batch, measure the
+        memory in use and adapt the window; release() frees queued work.
+        """
+        self._in_batch += 1
+        if self._in_batch < self.window:
+            return
+        self._in_batch = 0
+
+        used_mb = process_tree_memory_mb()
+        if used_mb is None:
+            return
+        self.stats['memory_checks'] += 1
+        self.stats['peak_memory_mb'] = round(max(self.stats['peak_memory_mb'], used_mb), 1)
+
+        if used_mb > self.limit_mb * self.HIGH_WATER:
+            self.stats['memory_throttles'] += 1
+            release()
+            if self.window > 1 or used_mb > self.limit_mb:
+                # A full collection after every conversation costs more than rendering it, so
+                # at a window of 1 it is kept for when the limit itself is crossed
+                gc.collect()
+            if self.window == 1 and used_mb > self.limit_mb and not self._warned:
+                self._warned = True
+                print(f"\n⚠️  Using {used_mb:.0f} MB, above max_memory_mb ({self.limit_mb:.0f} MB), "
+                      f"even one conversation at a time")
+            self.window = max(1, self.window // 2)
+        elif used_mb < self.limit_mb * self.LOW_WATER:
+            self.window = min(self.max_window, self.window * 2)
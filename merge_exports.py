@@ -0,0 +1,76 @@
+def _iter_with_predicate(source, predicate):
+    """Conversations of one export, filtered by predicate(top-level fields) where the source supports it."""
+    if hasattr(source, 'iter_selected'):
+        return source.iter_selected(predicate)
+    return (entry for entry in source if predicate(entry))
+
+class MergedExports:
+    """
+    Conversations from several exports, deduplicated by id.
+
+    Successive ChatGPT exports overlap almost completely, so each conversation
+    id is rendered once, from the export with the newest update_time (later
+    exports win ties). Conversations without an id are always kept.
+
+    Built from a list of callables that each open one export (a
+    ConversationStream, or an export cache wrapper). The first pass records
+    the winning (export, position) per id; it runs in the constructor and,
+    on the export cache, only reads top-level fields. Iterating then
+    streams every export again and yields just the winners, in export
+    order. Both passes are linear in the total number of conversations.
+    """
+
+    def __init__(self, open_sources):
+        self.stats = {'exports': len(open_sources), 'conversations': 0, 'duplicates': 0}
+        self.winners = {}
+        for source_index, open_source in enumerate(open_sources):
+            self._scan(source_index, open_source())
+
+        # Fresh sources for the rendering pass (an export cache written
+        # during the first pass is read back here)
+        self.sources = [open_source() for open_source in open_sources]
+        self.total_bytes = sum(getattr(source, 'total_bytes', 0) for source in self.sources)
+
+    def _scan(self, source_index, source):
+        position = -1
+
+        def record(entry):
+            nonlocal position
+            position += 1
+            if not isinstance(entry, dict) or not entry.get('id'):
+                return False
+            self.stats['conversations'] += 1
+            update_time = entry.get('update_time') or float('-inf')
+            best = self.winners.get(entry['id'])
+            if best is not None:
+                self.stats['duplicates'] += 1
+                if update_time < best[2]:
+                    return False
+            self.winners[entry['id']] = (source_index, position, update_time)
+            return False
+
+        for _ in _iter_with_predicate(source, record):
+            pass
+
+    @property
+    def bytes_read(self):
+        return sum(getattr(source, 'bytes_read', 0) for source in self.sources)
+
+    def __iter__(self):
+        return self.iter_selected(None)
+
+    def iter_selected(self, predicate):
+        """Yield the winning conversations that also pass predicate (if given)."""
+        for source_index, source in enumerate(self.sources):
+            position = -1
+
+            def keep(entry, source_index=source_index):
+                nonlocal position
+                position += 1
+                if isinstance(entry, dict) and entry.get('id'):
+                    winner = self.winners.get(entry['id'])
+                    if winner is None or winner[:2] != (source_index, position):
+                        return False
+                return predicate is None or predicate(entry)
+
+            yield from _iter_with_predicate(source, keep)
@@ -0,0 +1,82 @@
+from export_cache import CONVERSATION_KEYS
+
+class Message:
+    """
+    The parts of an exported message the renderer reads.
+
+    content is kept whole (parts, asset pointers, thoughts, ...), since
+    that is what gets rendered; author, recipient and metadata are reduced
+    to the few values used. name and recipient hold the defaults the
+    renderer used to apply ('tool' and '').
+    """
+
+    __slots__ = ('role', 'name', 'recipient', 'create_time', 'content', 'hidden')
+
+    def __init__(self, role, name, recipient, create_time, content, hidden):
+        self.role = role
+        self.name = name
+        self.recipient = recipient
+        self.create_time = create_time
+        self.content = content
+        self.hidden = hidden
+
+    def __reduce__(self):
+        # Pickled as a flat tuple when sent to render workers
+        return (Message, (self.role, self.name, self.recipient, self.create_time, self.content, self.hidden))
+
+    @classmethod
+    def from_export(cls, message):
+        author = message.get('author')
+        if not isinstance(author, dict):
+            author = {}
+        metadata = message.get('metadata')
+        hidden = isinstance(metadata, dict) and bool(metadata.get('is_visually_hidden_from_conversation', False))
+        return cls(
+            author.get('role'),
+            author.get('name', 'tool'),
+            message.get('recipient', ''),
+            message.get('create_time'),
+            message.get('content', {}),
+            hidden,
+        )
+
+class Node:
+    """One node of a conversation tree: its message (or None) and its links."""
+
+    __slots__ = ('message', 'parent', 'children')
+
+    def __init__(self, message, parent, children):
+        self.message = message
+        self.parent = parent
+        self.children = children
+
+    def __reduce__(self):
+        return (Node, (self.message, self.parent, self.children))
+
+    @classmethod
+    def from_export(cls, node):
+        if not isinstance(node, dict):
+            return cls(None, None, ())
+        message = node.get('message')
+        return cls(
+            Message.from_export(message) if isinstance(message, dict) else None,
+            node.get('parent'),
+            tuple(node.get('children') or ()),
+        )
+
+def compact_conversation(entry):
+    """
+    Replace a raw exported conversation with the compact form the renderer
+    uses: its top-level fields plus a mapping of node id -> Node. Raw
+    message dicts, their metadata blobs (citations, model details, ...)
+    and fields the converter never reads are dropped. Conversations that
+    are already compact, and non-dict entries, are returned unchanged.
+    """
+    if not isinstance(entry, dict):
+        return entry
+    mapping = entry.get('mapping')
+    if not isinstance(mapping, dict) or all(isinstance(node, Node) for node in mapping.values()):
+        return entry
+    compact = {key: entry[key] for key in CONVERSATION_KEYS if key in entry}
+    compact['mapping'] = {node_id: Node.from_export(node) for node_id, node in mapping.items()}
+    return compact
@@ -1,6 +1,11 @@
+import os
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
 
+# Built-in date_folder_format values; they only depend on the year and month
+DATE_FOLDER_FORMATS = ('YYYY/MM-Month', 'YYYY-MM', 'YYYY/MM')
+
 def get_conversation_path(conversation, config, output_base):
     """
     Determine output path for a conversation based on organization mode.
@@ -82,15 +87,21 @@ def get_date_folder(conversation, config):
     # Get format from config (default: YYYY/MM-Month)
     date_format = config.get('date_folder_format', 'YYYY/MM-Month')
 
+    if date_format in DATE_FOLDER_FORMATS:
+        return _month_folder(date_format, date.year, date.month)
+    else:
+        # Custom format
+        return date.strftime(date_format)
+
+@lru_cache(maxsize=None)
+def _month_folder(date_format, year, month):
+    """Folder name for a built-in date format, formatted once per month."""
+    date = datetime(year, month, 1)
     if date_format == 'YYYY/MM-Month':
         return f"{date.year}/{date.strftime('%m-%B')}"
     elif date_format == 'YYYY-MM':
         return date.strftime('%Y-%m')
-    elif date_format == 'YYYY/MM':
-        return f"{date.year}/{date.strftime('%m')}"
-    else:
-        # Custom format
-        return date.strftime(date_format)
+    return f"{date.year}/{date.strftime('%m')}"
 
 def get_asset_path(output_base, file_type, config):
     """
@@ -104,10 +115,10 @@ def get_asset_path(output_base, file_type, config):
     Returns:
         Path to asset subdirectory
     """
-    output_base = Path(output_base)
-
-    separate_assets = config.get('separate_assets_by_type', True)
+    return _asset_dir(Path(output_base), file_type, bool(config.get('separate_assets_by_type', True)))
 
+@lru_cache(maxsize=None)
+def _asset_dir(output_base, file_type, separate_assets):
     if separate_assets:
         if file_type == 'audio':
             subdir = 'Audio'
@@ -135,14 +146,19 @@ def get_relative_asset_path(conversation_path, asset_path):
     conversation_path = Path(conversation_path)
     asset_path = Path(asset_path)
 
+    # Every asset in a folder gets the same prefix, so it is worked out once per folder pair
+    rel_dir = _relative_asset_dir(conversation_path.parent, asset_path.parent)
+    return f"{rel_dir}/{asset_path.name}" if rel_dir != '.' else asset_path.name
+
+@lru_cache(maxsize=4096)
+def _relative_asset_dir(conversation_dir, asset_dir):
     # Calculate relative path from conversation file to asset
     try:
-        rel_path = asset_path.relative_to(conversation_path.parent.parent)
+        rel_path = asset_dir.relative_to(conversation_dir.parent)
         return str(rel_path).replace('\\', '/')  # Use forward slashes for markdown
     except ValueError:
         # If relative path fails, try using os.path.relpath
-        import os
-        rel = os.path.relpath(asset_path, conversation_path.parent)
+        rel = os.path.relpath(asset_dir, conversation_dir)
         return rel.replace('\\', '/')
 
 def create_organization_summary(conversations, config, output_base):
@@ -180,6 +196,55 @@ def create_organization_summary(conversations, config, output_base):
 
     return summary
 
+def plan_output_directories(conversations, config, output_base, selection=None):
+    """
+    Collect every folder a run will write into, in one pass over the
+    conversations' top-level fields (like create_organization_summary).
+    Assets/ folders are not planned, since only the types actually
+    attached get a folder.
+
+    Args:
+        conversations: Iterable of conversation dicts (the mapping is not needed)
+        selection: Optional Selection; only matching conversations are planned
+
+    Returns:
+        Set of Path objects
+    """
+    output_base = Path(output_base)
+    folders = set()
+    for conv in conversations:
+        if not isinstance(conv, dict) or (selection is not None and not selection.matches(conv)):
+            continue
+        folders.add(get_conversation_path(conv, config, output_base))
+    return folders
+
+class OutputDirectories:
+    """
+    Creates output folders at most once per run.
+
+    create_all() makes the planned folders in one batch, deepest first so
+    each mkdir also creates the parents the others need; ensure() is then
+    a set lookup for any folder already made, and only calls mkdir for
+    folders the plan did not cover (e.g. when the conversations could not
+    be scanned up front). Safe to call from writer threads: a race only
+    repeats an idempotent mkdir.
+    """
+
+    def __init__(self):
+        self.created = set()
+
+    def create_all(self, folders):
+        for folder in sorted(folders, key=lambda folder: -len(Path(folder).parts)):
+            self.ensure(folder)
+
+    def ensure(self, folder):
+        folder = Path(folder)
+        if folder in self.created:
+            return
+        folder.mkdir(parents=True, exist_ok=True)
+        self.created.add(folder)
+        self.created.update(folder.parents)
+
 if __name__ == "__main__":
     # Test the organization logic
     test_config = {
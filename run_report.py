@@ -0,0 +1,111 @@
+import heapq
+import json
+import platform
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from json_backend import JSON_BACKEND
+
+RUN_REPORT_NAME = 'run-report.json'
+
+class RunMetrics:
+    """
+    Wall time, call counts and counters for the hot paths of a conversion.
+
+    Stage times are inclusive: e.g. 'message_content' includes the
+    'attachment_resolution' calls made while rendering that content.
+    Worker processes keep their own RunMetrics and the parent merges them
+    with merge(other.to_dict()).
+    """
+
+    def __init__(self, keep_slowest=10):
+        self.stages = {}
+        self.counters = {}
+        self.keep_slowest = keep_slowest
+        self._slowest = []  # min-heap of (seconds, id, title)
+
+    def add_time(self, stage, seconds, calls=1):
+        entry = self.stages.get(stage)
+        if entry is None:
+            self.stages[stage] = [seconds, calls]
+        else:
+            entry[0] += seconds
+            entry[1] += calls
+
+    @contextmanager
+    def timed(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - start)
+
+    def timed_iter(self, iterable, stage):
+        """Yield from iterable, charging the time spent producing each item to stage."""
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add_time(stage, time.perf_counter() - start, calls=0)
+                return
+            self.add_time(stage, time.perf_counter() - start)
+            yield item
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_conversation(self, seconds, conversation_id, title):
+        item = (seconds, conversation_id or '', title or '')
+        if len(self._slowest) < self.keep_slowest:
+            heapq.heappush(self._slowest, item)
+        elif item > self._slowest[0]:
+            heapq.heapreplace(self._slowest, item)
+
+    def merge(self, data):
+        for stage, (seconds, calls) in data.get('stages', {}).items():
+            self.add_time(stage, seconds, calls)
+        for name, amount in data.get('counters', {}).items():
+            self.count(name, amount)
+
+    def to_dict(self):
+        return {
+            'stages': {stage: list(entry) for stage, entry in self.stages.items()},
+            'counters': dict(self.counters),
+        }
+
+    def slowest_conversations(self):
+        return [
+            {'id': conversation_id, 'title': title, 'seconds': round(seconds, 4)}
+            for seconds, conversation_id, title in sorted(self._slowest, reverse=True)
+        ]
+
+def write_run_report(output_base, metrics, stats, config, total_seconds):
+    """
+    Write run-report.json into the output directory.
+
+    Returns:
+        Path to the report
+    """
+    report = {
+        'finished': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'json_backend': JSON_BACKEND,
+        'total_seconds': round(total_seconds, 3),
+        'workers': int(config.get('workers', 1) or 1),
+        'input_mode': config.get('input_mode'),
+        'stages': {
+            stage: {'seconds': round(seconds, 4), 'calls': calls}
+            for stage, (seconds, calls) in sorted(metrics.stages.items(), key=lambda item: -item[1][0])
+        },
+        'counters': dict(sorted(metrics.counters.items())),
+        'stats': stats,
+        'slowest_conversations': metrics.slowest_conversations(),
+    }
+
+    report_path = Path(output_base) / RUN_REPORT_NAME
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    return report_path
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+SQLite FTS5 search index over converted conversations.
+
+process_conversations fills the index while it writes the markdown (config
+'search_index': true), one row per rendered message. This module is also a
+small query CLI:
+
+Usage:
+    python search_index.py QUERY [--output OUTPUT_DIR] [--limit N]
+
+QUERY uses FTS5 syntax, e.g. 'obsidian AND vault', '"exact phrase"',
+'title:python', 'author:ChatGPT docker'.
+"""
+import argparse
+import json
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+
+SEARCH_INDEX_NAME = 'search-index.sqlite'
+
+# Bump when the schema changes so old databases are rebuilt
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    id TEXT PRIMARY KEY,
+    update_time REAL,
+    fingerprint TEXT
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    conversation_id TEXT NOT NULL,
+    position INTEGER,
+    title TEXT,
+    author TEXT,
+    category TEXT,
+    path TEXT,
+    create_time REAL,
+    update_time REAL,
+    content TEXT
+);
+CREATE INDEX IF NOT EXISTS messages_conversation ON messages(conversation_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    title, author, content,
+    content='messages', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS messages_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts(rowid, title, author, content)
+    VALUES (new.id, new.title, new.author, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_delete AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts(messages_fts, rowid, title, author, content)
+    VALUES ('delete', old.id, old.title, old.author, old.content);
+END;
+"""
+
+def fts5_available():
+    try:
+        conn = sqlite3.connect(':memory:')
+        try:
+            conn.execute("CREATE VIRTUAL TABLE probe USING fts5(text)")
+        finally:
+            conn.close()
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+class SearchIndex:
+    """
+    Incrementally maintained search database in the output directory.
+
+    Every conversation's rows are replaced as a whole when it is re-rendered.
+    The conversations table remembers the update_time and config fingerprint
+    each conversation was indexed with, so the incremental skip can tell
+    whether the index (and not just the markdown file) is current.
+    All changes of a run are committed together by close().
+    """
+
+    def __init__(self, output_base):
+        self.path = Path(output_base) / SEARCH_INDEX_NAME
+        self.conn = sqlite3.connect(self.path)
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self._reset()
+        self.conn.executescript(SCHEMA)
+        self.indexed = {
+            conversation_id: (update_time, fingerprint)
+            for conversation_id, update_time, fingerprint
+            in self.conn.execute("SELECT id, update_time, fingerprint FROM conversations")
+        }
+
+    def _reset(self):
+        for name in ('messages_insert', 'messages_delete'):
+            self.conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        for name in ('messages_fts', 'messages', 'conversations'):
+            self.conn.execute(f"DROP TABLE IF EXISTS {name}")
+        self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def is_current(self, conversation_id, update_time, fingerprint):
+        return self.indexed.get(conversation_id) == (update_time, fingerprint)
+
+    def replace_conversation(self, conversation_id, update_time, fingerprint, title, category, path, rows):
+        """
+        Replace a conversation's messages.
+        rows are (author, create_time, content) tuples in reading order.
+        """
+        self.conn.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
+        self.conn.executemany(
+            "INSERT INTO messages (conversation_id, position, title, author, category, path,"
+            " create_time, update_time, content) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (conversation_id, position, title, author, category, path, create_time, update_time, content)
+                for position, (author, create_time, content) in enumerate(rows)
+            ]
+        )
+        self.conn.execute(
+            "INSERT OR REPLACE INTO conversations (id, update_time, fingerprint) VALUES (?, ?, ?)",
+            (conversation_id, update_time, fingerprint)
+        )
+        self.indexed[conversation_id] = (update_time, fingerprint)
+
+    def remove_conversation(self, conversation_id):
+        self.conn.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
+        self.conn.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,))
+        self.indexed.pop(conversation_id, None)
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+def open_search_index(output_base):
+    """Open (or create) the search index, or return None if this SQLite build lacks FTS5."""
+    if not fts5_available():
+        print("⚠️  SQLite FTS5 is not available in this Python build; skipping the search index")
+        return None
+    return SearchIndex(output_base)
+
+def search(output_base, query, limit=20):
+    """
+    Run an FTS5 query against the index.
+
+    Returns:
+        list of hit dicts, best match first
+    """
+    index_path = Path(output_base) / SEARCH_INDEX_NAME
+    if not index_path.exists():
+        raise FileNotFoundError(f"No search index at {index_path} (enable 'search_index' in config.json)")
+
+    conn = sqlite3.connect(index_path)
+    try:
+        cursor = conn.execute(
+            "SELECT m.conversation_id, m.title, m.author, m.category, m.path, m.create_time,"
+            " snippet(messages_fts, 2, '[', ']', '…', 16), bm25(messages_fts)"
+            " FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid"
+            " WHERE messages_fts MATCH ? ORDER BY bm25(messages_fts) LIMIT ?",
+            (query, limit)
+        )
+        return [
+            {
+                'conversation_id': conversation_id,
+                'title': title,
+                'author': author,
+                'category': category,
+                'path': str(Path(output_base) / path),
+                'create_time': create_time,
+                'snippet': snippet,
+                'score': round(-score, 4),
+            }
+            for conversation_id, title, author, category, path, create_time, snippet, score in cursor
+        ]
+    finally:
+        conn.close()
+
+def _default_output_dir():
+    config_path = Path("config.json")
+    if config_path.exists():
+        with open(config_path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('output_directory', '.')
+    return '.'
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search converted ChatGPT conversations.")
+    parser.add_argument("query", help="FTS5 query, e.g. 'docker AND compose' or '\"exact phrase\"'")
+    parser.add_argument("--output", help="Output directory containing the index (default: from config.json)")
+    parser.add_argument("--limit", type=int, default=20, help="Maximum number of hits")
+    parser.add_argument("--json", action="store_true", help="Print hits as JSON")
+    args = parser.parse_args(argv)
+
+    output_dir = args.output or _default_output_dir()
+    try:
+        hits = search(output_dir, args.query, args.limit)
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    except sqlite3.OperationalError as e:
+        print(f"❌ Invalid query: {e}")
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(hits, indent=2, ensure_ascii=False))
+        return
+    if not hits:
+        print("🔍 No matches")
+        return
+    for hit in hits:
+        date = datetime.fromtimestamp(hit['create_time']).strftime('%Y-%m-%d') if hit['create_time'] else ''
+        print(f"📄 {hit['title']}  ({hit['author']}, {date})")
+        print(f"   {hit['path']}")
+        print(f"   {' '.join(hit['snippet'].split())}\n")
+
+if __name__ == "__main__":
+    main()
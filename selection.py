@@ -0,0 +1,84 @@
+import re
+from datetime import datetime
+from organize import get_conversation_category
+
+# Config keys that select which conversations are converted
+SELECTION_KEYS = (
+    'select_ids',
+    'select_categories',
+    'created_after',
+    'created_before',
+    'updated_after',
+    'updated_before',
+    'title_pattern',
+)
+
+CATEGORIES = ('starred', 'archived', 'regular')
+
+def _timestamp(value, key):
+    """Config date ('2025-01-31', '2025-01-31T14:00') or epoch seconds -> epoch seconds."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        raise ValueError(f"Invalid {key} {value!r}, expected a date like 2025-01-31") from None
+
+class Selection:
+    """
+    Conversation filters from config, checked against top-level fields only
+    (id, title, timestamps, starred/archived flags), so a conversation can be
+    rejected before its messages are looked at.
+
+    All configured filters must match. *_after bounds are inclusive and
+    *_before bounds exclusive; conversations without the timestamp a date
+    filter needs are not selected.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.ids = set(config.get('select_ids') or ()) or None
+        categories = config.get('select_categories') or ()
+        unknown = set(categories) - set(CATEGORIES)
+        if unknown:
+            raise ValueError(f"Unknown select_categories {sorted(unknown)}, expected: {', '.join(CATEGORIES)}")
+        self.categories = set(categories) or None
+        self.ranges = [
+            (field, _timestamp(config[key], key) if config.get(key) is not None else None, is_after)
+            for key, field, is_after in (
+                ('created_after', 'create_time', True),
+                ('created_before', 'create_time', False),
+                ('updated_after', 'update_time', True),
+                ('updated_before', 'update_time', False),
+            )
+        ]
+        self.ranges = [(field, bound, is_after) for field, bound, is_after in self.ranges if bound is not None]
+        pattern = config.get('title_pattern')
+        self.title_pattern = re.compile(pattern) if pattern else None
+
+    def _category(self, entry):
+        category = get_conversation_category(entry, self.config)
+        if category is None:
+            return 'regular'
+        return 'starred' if entry.get('is_starred') else 'archived'
+
+    def matches(self, entry):
+        if not isinstance(entry, dict):
+            return False
+        if self.ids is not None and entry.get('id') not in self.ids:
+            return False
+        for field, bound, is_after in self.ranges:
+            value = entry.get(field)
+            if value is None or (value < bound if is_after else value >= bound):
+                return False
+        if self.categories is not None and self._category(entry) not in self.categories:
+            return False
+        if self.title_pattern is not None and not self.title_pattern.search(entry.get('title') or ''):
+            return False
+        return True
+
+def compile_selection(config):
+    """Selection for the filters set in config, or None when every conversation is converted."""
+    if not any(config.get(key) for key in SELECTION_KEYS):
+        return None
+    return Selection(config)
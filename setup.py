@@ -3,7 +3,7 @@ import json
 import os
 import sys
 from pathlib import Path
-from extract_zip import extract_chatgpt_zip, is_zip_file, is_extracted_directory
+from extract_zip import extract_chatgpt_zip, is_zip_file, is_extracted_directory, list_zip_conversations
 
 # Fix Windows console encoding for emojis
 if sys.platform == 'win32':
@@ -80,7 +80,10 @@ def get_user_input(prompt, default=None, valid_options=None):
         return user_input
 
 def get_input_path():
-    """Get and validate input path (ZIP or directory)"""
+    """
+    Get and validate input path (ZIP or directory).
+    Returns (input_path, input_mode) where input_mode is 'zip' or 'directory'.
+    """
     print("\n📦 ChatGPT Export Location")
     print("   You can provide:")
     print("   - Path to the ZIP file you downloaded from ChatGPT")
@@ -98,17 +101,33 @@ def get_input_path():
 
         if is_zip_file(path):
             print(f"\n   ✅ Found ZIP file: {path.name}")
+            print("   The converter can read the ZIP directly (no extra disk space,")
+            print("   only referenced images/audio are copied out), or extract it first.")
+            read_direct = get_user_input(
+                "   Read directly from the ZIP? (Y/N)",
+                default="Y",
+                valid_options=['Y', 'N', 'YES', 'NO']
+            ).upper()
+
+            if read_direct in ['Y', 'YES']:
+                try:
+                    list_zip_conversations(path)
+                    return str(path.resolve()), 'zip'
+                except Exception as e:
+                    print(f"   ❌ Error reading ZIP: {e}")
+                    continue
+
             print(f"   📦 Extracting...")
             try:
                 extracted_path = extract_chatgpt_zip(path)
-                return str(extracted_path)
+                return str(extracted_path), 'directory'
             except Exception as e:
                 print(f"   ❌ Error extracting ZIP: {e}")
                 continue
 
         elif is_extracted_directory(path):
             print(f"\n   ✅ Found ChatGPT export folder: {path.name}")
-            return str(path)
+            return str(path), 'directory'
 
         else:
             print(f"   ❌ Invalid path. Could not find:")
@@ -129,8 +148,7 @@ def run_setup():
     print()
 
     # 2. Input path (ZIP or directory)
-    config['input_path'] = get_input_path()
-    config['input_mode'] = 'directory'
+    config['input_path'], config['input_mode'] = get_input_path()
 
     # 3. Output directory
     print("\n📂 Output Location")
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Generate fake ChatGPT exports for benchmarking and manual testing.
+
+Usage:
+    python synthetic_export.py OUTPUT_DIR [--conversations N] [--messages M]
+                               [--layout sharded|legacy] [--zip] ...
+"""
+import argparse
+import json
+import random
+import uuid
+import zipfile
+from pathlib import Path
+
+WORDS = (
+    "the quick model answers questions about python data markdown export image audio "
+    "function class module config vault obsidian branch message thread token latency "
+    "memory disk process worker stream index cache file folder result error value"
+).split()
+
+CODE_SNIPPET = "def example(value):\n    return [item * 2 for item in value if item]\n"
+
+def _text(rng, min_words, max_words):
+    words = rng.choices(WORDS, k=rng.randint(min_words, max_words))
+    text = " ".join(words).capitalize() + "."
+    if rng.random() < 0.15:
+        text += f"\n\n```python\n{CODE_SNIPPET}```\n"
+    if rng.random() < 0.05:
+        text += "\n\n![diagram](sandbox:/mnt/data/diagram.png)"
+    return text
+
+def _uuid(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+def _file_id(rng, audio=False):
+    if audio:
+        return f"file_{rng.getrandbits(128):032x}"
+    return "file-" + "".join(rng.choices("ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz0123456789", k=22))
+
+class _AssetWriter:
+    """Writes attachment files into the export folder and returns pointer parts."""
+
+    def __init__(self, base, rng, asset_bytes):
+        self.base = Path(base)
+        self.rng = rng
+        self.asset_bytes = asset_bytes
+        self.user_dir = self.base / f"user-{_uuid(rng)[:12]}"
+        # A small pool of shared payloads so some assets are byte-identical
+        self.shared = [self._random_bytes() for _ in range(4)]
+        self.count = 0
+
+    def _random_bytes(self):
+        return self.rng.getrandbits(self.asset_bytes * 8).to_bytes(self.asset_bytes, 'little')
+
+    def _payload(self):
+        if self.rng.random() < 0.2:
+            return self.rng.choice(self.shared)
+        return self._random_bytes()
+
+    def _write(self, path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(self._payload())
+        self.count += 1
+
+    def image(self):
+        file_id = _file_id(self.rng)
+        folder = self.user_dir if self.rng.random() < 0.3 else self.base
+        self._write(folder / f"{file_id}-screenshot.png")
+        return {"content_type": "image_asset_pointer", "asset_pointer": f"file-service://{file_id}",
+                "width": 800, "height": 600}
+
+    def dalle(self):
+        file_id = _file_id(self.rng)
+        self._write(self.base / "dalle-generations" / f"{file_id}-{_uuid(self.rng)}.webp")
+        return {"content_type": "image_asset_pointer", "asset_pointer": f"file-service://{file_id}",
+                "metadata": {"dalle": {"prompt": "a generated picture"}}}
+
+    def audio(self, conversation_id):
+        file_id = _file_id(self.rng, audio=True)
+        self._write(self.base / conversation_id / "audio" / f"{file_id}-{_uuid(self.rng)}.wav")
+        start = 0.0
+        end = round(self.rng.uniform(1, 30), 2)
+        return {"content_type": "audio_asset_pointer", "asset_pointer": f"sediment://{file_id}",
+                "metadata": {"start": start, "end": end}}
+
+def _message(rng, node_id, role, create_time, content, recipient="all", hidden=False, name=None):
+    author = {"role": role, "name": name, "metadata": {}}
+    metadata = {"is_visually_hidden_from_conversation": True} if hidden else {}
+    return {
+        "id": node_id,
+        "author": author,
+        "create_time": create_time,
+        "update_time": None,
+        "content": content,
+        "status": "finished_successfully",
+        "end_turn": True,
+        "weight": 1.0,
+        "metadata": metadata,
+        "recipient": recipient,
+    }
+
+def _assistant_content(rng):
+    roll = rng.random()
+    if roll < 0.05:
+        return {"content_type": "thoughts",
+                "thoughts": [{"summary": "Considering", "content": _text(rng, 10, 40)}]}, "all"
+    if roll < 0.08:
+        return {"content_type": "reasoning_recap", "content": "Thought for 4 seconds"}, "all"
+    if roll < 0.11:
+        return {"content_type": "code", "language": "unknown", "text": "search('python markdown')"}, "web"
+    return {"content_type": "text", "parts": [_text(rng, 20, 400)]}, "all"
+
+def generate_conversation(rng, index, messages, assets, ratios, branch_ratio):
+    """Build one conversation dict with a realistic mapping tree."""
+    conversation_id = _uuid(rng)
+    create_time = 1672531200 + index * 3600 + rng.random()
+    mapping = {}
+
+    def add(node_id, message, parent):
+        mapping[node_id] = {"id": node_id, "message": message, "parent": parent, "children": []}
+        if parent:
+            mapping[parent]["children"].append(node_id)
+
+    root = _uuid(rng)
+    add(root, None, None)
+    system = _uuid(rng)
+    add(system, _message(rng, system, "system", None,
+                         {"content_type": "text", "parts": [""]}, hidden=True), root)
+
+    parent = system
+    t = create_time
+    for turn in range(messages):
+        t += rng.uniform(5, 120)
+        node_id = _uuid(rng)
+        if turn % 2 == 0:
+            parts = []
+            roll = rng.random()
+            if roll < ratios['image']:
+                parts.append(assets.image())
+            elif roll < ratios['image'] + ratios['audio']:
+                parts.append(assets.audio(conversation_id))
+            parts.append(_text(rng, 5, 80))
+            content_type = "multimodal_text" if len(parts) > 1 else "text"
+            message = _message(rng, node_id, "user", t, {"content_type": content_type, "parts": parts})
+        else:
+            if rng.random() < ratios['dalle']:
+                tool_id = _uuid(rng)
+                add(tool_id, _message(rng, tool_id, "tool", t,
+                                      {"content_type": "multimodal_text", "parts": [assets.dalle()]},
+                                      name="dalle.text2im"), parent)
+                parent = tool_id
+            content, recipient = _assistant_content(rng)
+            message = _message(rng, node_id, "assistant", t, content, recipient=recipient)
+
+            # Occasionally leave a regenerated alternative on a side branch
+            if rng.random() < branch_ratio:
+                alt_id = _uuid(rng)
+                add(alt_id, _message(rng, alt_id, "assistant", t - 1,
+                                     {"content_type": "text", "parts": [_text(rng, 20, 200)]}), parent)
+        add(node_id, message, parent)
+        parent = node_id
+
+    return {
+        "title": " ".join(rng.choices(WORDS, k=rng.randint(2, 6))).capitalize(),
+        "create_time": create_time,
+        "update_time": t,
+        "mapping": mapping,
+        "moderation_results": [],
+        "current_node": parent,
+        "plugin_ids": None,
+        "conversation_id": conversation_id,
+        "conversation_template_id": None,
+        "gizmo_id": None,
+        "is_archived": rng.random() < 0.1,
+        "is_starred": rng.random() < 0.05,
+        "safe_urls": [],
+        "default_model_slug": "gpt-4o",
+        "id": conversation_id,
+    }
+
+def generate_export(output_dir, conversations=200, messages=30, layout='sharded', shard_size=100,
+                    image_ratio=0.1, audio_ratio=0.03, dalle_ratio=0.02, branch_ratio=0.05,
+                    asset_bytes=4096, seed=0, make_zip=False):
+    """
+    Write a synthetic ChatGPT export.
+
+    Returns:
+        dict describing what was generated (paths, counts, sizes)
+    """
+    rng = random.Random(seed)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    assets = _AssetWriter(output_dir, rng, asset_bytes)
+    ratios = {'image': image_ratio, 'audio': audio_ratio, 'dalle': dalle_ratio}
+
+    def conversation_iter():
+        for i in range(conversations):
+            yield generate_conversation(rng, i, messages, assets, ratios, branch_ratio)
+
+    json_files = []
+    if layout == 'legacy':
+        json_files.append(_write_array(output_dir / "conversations.json", conversation_iter()))
+    else:
+        batch = []
+        for conversation in conversation_iter():
+            batch.append(conversation)
+            if len(batch) >= shard_size:
+                json_files.append(_write_array(output_dir / f"conversations-{len(json_files):03d}.json", batch))
+                batch = []
+        if batch or not json_files:
+            json_files.append(_write_array(output_dir / f"conversations-{len(json_files):03d}.json", batch))
+
+    (output_dir / "user.json").write_text(json.dumps({"id": "user-synthetic", "email": "user@example.com"}))
+
+    info = {
+        'path': str(output_dir),
+        'layout': layout,
+        'conversations': conversations,
+        'messages_per_conversation': messages,
+        'assets': assets.count,
+        'json_files': len(json_files),
+        'json_bytes': sum(f.stat().st_size for f in json_files),
+    }
+
+    if make_zip:
+        zip_path = output_dir.with_suffix('.zip')
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zf:
+            for path in sorted(output_dir.rglob('*')):
+                if path.is_file():
+                    zf.write(path, path.relative_to(output_dir).as_posix())
+        info['zip'] = str(zip_path)
+        info['zip_bytes'] = zip_path.stat().st_size
+
+    return info
+
+def _write_array(path, items):
+    """Write a JSON array one element at a time so huge exports don't need to fit in memory."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[')
+        for i, item in enumerate(items):
+            if i:
+                f.write(', ')
+            json.dump(item, f)
+        f.write(']')
+    return path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic ChatGPT export.")
+    parser.add_argument("output_dir", help="Folder to write the export into")
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=30, help="Messages per conversation")
+    parser.add_argument("--layout", choices=['sharded', 'legacy'], default='sharded')
+    parser.add_argument("--shard-size", type=int, default=100, help="Conversations per shard file")
+    parser.add_argument("--image-ratio", type=float, default=0.1, help="Share of user turns with an image")
+    parser.add_argument("--audio-ratio", type=float, default=0.03, help="Share of user turns with audio")
+    parser.add_argument("--dalle-ratio", type=float, default=0.02, help="Share of assistant turns with a DALL-E image")
+    parser.add_argument("--branch-ratio", type=float, default=0.05, help="Share of assistant turns with a regenerated branch")
+    parser.add_argument("--asset-bytes", type=int, default=4096, help="Size of each fake attachment")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--zip", action="store_true", help="Also package the export as OUTPUT_DIR.zip")
+    args = parser.parse_args(argv)
+
+    info = generate_export(
+        args.output_dir,
+        conversations=args.conversations,
+        messages=args.messages,
+        layout=args.layout,
+        shard_size=args.shard_size,
+        image_ratio=args.image_ratio,
+        audio_ratio=args.audio_ratio,
+        dalle_ratio=args.dalle_ratio,
+        branch_ratio=args.branch_ratio,
+        asset_bytes=args.asset_bytes,
+        seed=args.seed,
+        make_zip=args.zip,
+    )
+    print(json.dumps(info, indent=2))
+
+if __name__ == "__main__":
+    main()
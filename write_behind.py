@@ -0,0 +1,237 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from run_report import RunMetrics
+
+def encode_text(text):
+    """The bytes a text-mode write would produce: platform newlines, UTF-8."""
+    if os.linesep != '\n':
+        text = text.replace('\n', os.linesep)
+    return text.encode('utf-8')
+
+def _tmp_path(file_path):
+    """
+    The temp file writes to file_path go through. Writes to one path never
+    overlap (WriteBehind orders them by key), so the name is fixed per
+    target: one left behind by a killed run is reused by the next write.
+    """
+    return file_path.with_name(f".{file_path.name}.tmp")
+
+def _sync(f):
+    """Flush f to disk, so a rename after a power loss never exposes an empty file."""
+    f.flush()
+    os.fsync(f.fileno())
+
+def write_bytes_atomic(file_path, data, make_parents=True):
+    """
+    Write data to file_path through a temp file in the same folder, synced
+    to disk, and an atomic rename, so readers (and a crashed run) only ever
+    see the old file or the complete new one. make_parents=False skips the
+    mkdir when the caller has already created the folder.
+    """
+    file_path = Path(file_path)
+    if make_parents:
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = _tmp_path(file_path)
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            _sync(f)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
+
+def write_text_if_changed(file_path, text, make_parents=True):
+    """
+    Write text atomically unless file_path already holds exactly these
+    bytes. Unchanged files are left alone, keeping their mtime, so sync
+    tools, git and backups see no change. Existing files are only read
+    when their size matches.
+
+    Returns:
+        (status, bytes_written) with status 'new', 'updated' or 'unchanged'
+    """
+    data = encode_text(text)
+    try:
+        size = os.stat(file_path).st_size
+    except OSError:
+        status = 'new'
+    else:
+        if size == len(data):
+            with open(file_path, 'rb') as f:
+                if f.read() == data:
+                    return 'unchanged', 0
+        status = 'updated'
+    write_bytes_atomic(file_path, data, make_parents)
+    return status, len(data)
+
+def write_pieces_if_changed(file_path, pieces, make_parents=True):
+    """
+    write_text_if_changed for text produced piece by piece, e.g. while a
+    conversation renders. Each piece is encoded and compared with the
+    existing file as it arrives. The temp file is only started at the
+    first difference (with the matching prefix copied over from the old
+    file), so the text is never held whole and an unchanged file is
+    neither rewritten nor given a temp copy.
+
+    Returns:
+        (status, bytes_written) with status 'new', 'updated' or 'unchanged'
+    """
+    file_path = Path(file_path)
+    if make_parents:
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = _tmp_path(file_path)
+    try:
+        existing = open(file_path, 'rb')
+    except OSError:
+        existing = None
+    status = 'new' if existing is None else 'updated'
+
+    out = None
+    matched = 0
+    written = 0
+    try:
+        try:
+            for piece in pieces:
+                data = encode_text(piece)
+                written += len(data)
+                if out is None and existing is not None and existing.read(len(data)) == data:
+                    matched += len(data)
+                    continue
+                if out is None:
+                    out = _start_tmp_file(tmp_path, existing, matched)
+                out.write(data)
+            if out is None:
+                if existing is not None and not existing.read(1):
+                    return 'unchanged', 0
+                # The old file only grew a longer tail, which the new text drops
+                out = _start_tmp_file(tmp_path, existing, matched)
+            _sync(out)
+        finally:
+            if existing is not None:
+                existing.close()
+            if out is not None:
+                out.close()
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
+    return status, written
+
+def _start_tmp_file(tmp_path, existing, matched):
+    """Open the temp file for write_pieces_if_changed, starting with the first matched bytes of the old file."""
+    out = open(tmp_path, 'wb')
+    if matched:
+        existing.seek(0)
+        remaining = matched
+        while remaining:
+            chunk = existing.read(min(remaining, 1024 * 1024))
+            out.write(chunk)
+            remaining -= len(chunk)
+    return out
+
+class WriteBehind:
+    """
+    Runs output I/O (markdown writes, asset copies) on a pool of writer
+    threads so rendering does not wait on the disk.
+
+    At most max_pending tasks are queued or running; submit() blocks when
+    the queue is full, which bounds the memory held by rendered documents
+    waiting to be written. Tasks with the same key (an output path) run in
+    submission order. The first error raised by a task is re-raised from
+    the next submit() or from close().
+
+    Tasks report their time and byte counts through add_time() and count(),
+    which collect them in self.metrics (summed across threads); the caller
+    merges that into the run metrics once the writers are done.
+    """
+
+    def __init__(self, threads=4, max_pending=64):
+        self.pool = ThreadPoolExecutor(max_workers=max(1, threads), thread_name_prefix='c2md-writer')
+        self.max_pending = max(1, max_pending)
+        self.slots = threading.BoundedSemaphore(self.max_pending)
+        self.metrics = RunMetrics()
+        self._metrics_lock = threading.Lock()
+        self._by_key = {}
+        self._pending = set()
+        self._by_key_lock = threading.Lock()
+        self._error = None
+
+    def add_time(self, stage, seconds):
+        with self._metrics_lock:
+            self.metrics.add_time(stage, seconds)
+
+    def count(self, name, amount=1):
+        with self._metrics_lock:
+            self.metrics.count(name, amount)
+
+    def _run(self, func, args):
+        try:
+            return func(*args)
+        except BaseException as e:
+            if self._error is None:
+                self._error = e
+            raise
+        finally:
+            self.slots.release()
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def submit(self, func, *args, key=None):
+        """Queue func(*args); blocks while max_pending tasks are outstanding."""
+        self._raise_error()
+        if key is not None:
+            with self._by_key_lock:
+                previous = self._by_key.get(key)
+            if previous is not None and not previous.done():
+                # Same output path as an earlier task (e.g. duplicate titles): keep the write order
+                previous.exception()
+        self.slots.acquire()
+        future = self.pool.submit(self._run, func, args)
+        with self._by_key_lock:
+            self._pending.add(future)
+            if key is not None:
+                self._by_key[key] = future
+        future.add_done_callback(lambda done, key=key: self._forget(key, done))
+        return future
+
+    def _forget(self, key, future):
+        # Only tasks still running need ordering or cancelling, so finished ones are not kept for the whole run
+        with self._by_key_lock:
+            self._pending.discard(future)
+            if key is not None and self._by_key.get(key) is future:
+                del self._by_key[key]
+
+    def drain(self):
+        """Wait until every queued task has finished (the writers stay open) and re-raise the first failure."""
+        for _ in range(self.max_pending):
+            self.slots.acquire()
+        for _ in range(self.max_pending):
+            self.slots.release()
+        self._raise_error()
+
+    def close(self):
+        """Wait for every queued write and re-raise the first failure."""
+        self.pool.shutdown(wait=True)
+        self._by_key.clear()
+        self._pending.clear()
+        self._raise_error()
+
+    def abort(self):
+        """Drop queued writes and wait for running ones, ignoring their errors."""
+        # Cancelled by hand: shutdown(cancel_futures=True) needs Python 3.9
+        with self._by_key_lock:
+            pending = list(self._pending)
+        for future in pending:
+            future.cancel()
+        self.pool.shutdown(wait=True)
+        self._by_key.clear()
+        self._pending.clear()
+        self._error = None